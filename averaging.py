@@ -0,0 +1,68 @@
+from threading import Event
+
+import cv2
+import numpy as np
+
+class FrameAverager:
+    """Averages the next count frames into a float32 running sum, no frames are held.
+
+    With reject_outliers, each frame after the first few is clamped to mean +/- sigma * stddev of the frames
+    accumulated so far before it is added, so a flash or a hand passing through doesn't ghost into the still.
+    """
+
+    MIN_FRAMES_FOR_REJECTION = 3
+
+    def __init__(self, count, reject_outliers=False, sigma=2.0):
+        self.count = max(1, int(count))
+        self.reject_outliers = reject_outliers
+        self.sigma = sigma
+
+        self.added = 0
+        self.done = Event()
+        self._sum = None
+        self._sum_sq = None
+        self._sample = None
+        self._dtype = None
+
+    def add(self, frame):
+        """Accumulate a frame, returns True once count frames have been added."""
+        if self.done.is_set() or frame is None:
+            return self.done.is_set()
+
+        if self._sum is None:
+            self._sum = np.zeros(frame.shape, np.float32)
+            self._sample = np.empty(frame.shape, np.float32)
+            self._dtype = frame.dtype
+            if self.reject_outliers:
+                self._sum_sq = np.zeros(frame.shape, np.float32)
+        elif frame.shape != self._sum.shape:
+            # Resolution changed mid-capture, average what we have
+            self.done.set()
+            return True
+
+        sample = self._sample
+        np.copyto(sample, frame, casting="unsafe")
+
+        if self.reject_outliers and self.added >= self.MIN_FRAMES_FOR_REJECTION:
+            mean = self._sum / self.added
+            deviation = np.sqrt(np.maximum(self._sum_sq / self.added - mean * mean, 0)) * self.sigma
+            np.clip(sample, mean - deviation, mean + deviation, out=sample)
+
+        cv2.add(self._sum, sample, dst=self._sum)
+        if self._sum_sq is not None:
+            cv2.accumulateSquare(sample, self._sum_sq)
+
+        self.added += 1
+        if self.added >= self.count:
+            self.done.set()
+        return self.done.is_set()
+
+    def wait(self, timeout=None):
+        return self.done.wait(timeout)
+
+    def result(self):
+        """The averaged frame in the dtype of the input frames, None if nothing was added."""
+        if not self.added:
+            return None
+        return cv2.convertScaleAbs(self._sum, alpha=1.0 / self.added) if self._dtype == np.uint8 \
+            else (self._sum / self.added).astype(self._dtype)
@@ -0,0 +1,126 @@
+import time
+import weakref
+from threading import RLock
+
+import numpy as np
+
+class PooledArray(np.ndarray):
+    # Marker type for arrays handed out by a BufferPool, behaves like any ndarray
+    pass
+
+class BufferPool:
+    """Reusable frame memory keyed by (shape, dtype).
+
+    Each acquire() checks a block of memory out of the pool and wraps it in a new PooledArray. The array is the
+    base of every view taken from it, so the block is returned to the pool by the array's finalizer once the
+    array and all its views are gone: callers never hand buffers back explicitly, and memory still held by a
+    cache or another thread is never given out twice. release() returns a block early when its owner knows
+    nothing else uses it.
+    """
+
+    def __init__(self, max_per_key=16):
+        self.max_per_key = max_per_key
+        self._free = {}  # (shape, dtype) -> [(memory, returned at)], most recently returned last
+        self._finalizers = {}  # id(array) -> finalizer, for release()
+        self._lock = RLock()  # finalizers can run inside the lock when an allocation triggers garbage collection
+
+        self.hits = 0
+        self.misses = 0
+        self.pooled_bytes = 0  # checked out and free blocks together
+        self.peak_bytes = 0
+
+    def acquire(self, shape, dtype=np.uint8):
+        shape = tuple(shape)
+        dtype = np.dtype(dtype)
+        key = (shape, dtype.str)
+        with self._lock:
+            free = self._free.get(key)
+            if free:
+                memory, _ = free.pop()
+                self.hits += 1
+            else:
+                # A bytearray rather than an ndarray, so plain ndarray views keep the PooledArray as their base
+                memory = bytearray(int(np.prod(shape)) * dtype.itemsize)
+                self.misses += 1
+                self.pooled_bytes += len(memory)
+                self.peak_bytes = max(self.peak_bytes, self.pooled_bytes)
+
+        array = np.ndarray.__new__(PooledArray, shape, dtype, buffer=memory)
+        array_id = id(array)
+        finalizer = weakref.finalize(array, self._return, key, memory, array_id)
+        finalizer.atexit = False
+        self._finalizers[array_id] = finalizer
+        return array
+
+    def acquire_like(self, array):
+        return self.acquire(array.shape, array.dtype)
+
+    def copy(self, array):
+        buffer = self.acquire_like(array)
+        np.copyto(buffer, array)
+        return buffer
+
+    def release(self, array):
+        """Return an array's memory now; the array and its views must not be used afterwards."""
+        finalizer = self._finalizers.get(id(array))
+        if finalizer is not None and finalizer.peek() is not None and finalizer.peek()[0] is array:
+            finalizer()
+
+    def _return(self, key, memory, array_id):
+        with self._lock:
+            self._finalizers.pop(array_id, None)
+            free = self._free.setdefault(key, [])
+            if len(free) < self.max_per_key:
+                free.append((memory, time.monotonic()))
+            else:
+                self.pooled_bytes -= len(memory)
+
+    def trim(self):
+        # Drop free buffers, e.g. after the camera resolution changed
+        with self._lock:
+            for free in self._free.values():
+                self.pooled_bytes -= sum(len(memory) for memory, _ in free)
+                free.clear()
+
+    # Memory budget interface (see memory.py), only free blocks can be evicted
+
+    def memory_usage(self):
+        return self.pooled_bytes
+
+    def _oldest_free(self):
+        oldest = None
+        for key, free in self._free.items():
+            # Each list is in return order, its first block is its least recently used
+            if free and (oldest is None or free[0][1] < oldest[1]):
+                oldest = (key, free[0][1])
+        return oldest
+
+    def oldest_access(self):
+        with self._lock:
+            oldest = self._oldest_free()
+            return oldest[1] if oldest is not None else None
+
+    def evict_oldest(self):
+        with self._lock:
+            oldest = self._oldest_free()
+            if oldest is None:
+                return 0
+            memory, _ = self._free[oldest[0]].pop(0)
+            self.pooled_bytes -= len(memory)
+            return len(memory)
+
+    def hit_rate(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def stats(self):
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hit_rate(),
+            "pooled_bytes": self.pooled_bytes,
+            "peak_bytes": self.peak_bytes,
+        }
+
+# Shared by the capture threads, the node graph and the preview
+frame_pool = BufferPool()
@@ -0,0 +1,63 @@
+import cv2
+import numpy as np
+
+class CheckerboardCalibration:
+    """Collects checkerboard views and solves the camera matrix and lens distortion from them.
+
+    pattern is the number of inner corners (columns, rows). Results are returned normalized to the image
+    size, so they apply to the same camera at any resolution with the same aspect.
+    """
+
+    MIN_VIEWS = 5
+
+    def __init__(self, pattern=(9, 6)):
+        self.pattern = tuple(pattern)
+        self.image_size = None
+        self._image_points = []
+
+        # Corner positions on the board, in squares (the scale doesn't affect intrinsics)
+        self._object_points = np.zeros((self.pattern[0] * self.pattern[1], 3), np.float32)
+        self._object_points[:, :2] = np.mgrid[0:self.pattern[0], 0:self.pattern[1]].T.reshape(-1, 2)
+
+    @property
+    def views(self):
+        return len(self._image_points)
+
+    def add_view(self, frame):
+        """Detect the board in frame and keep its corners, returns False if it wasn't found."""
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY) if frame.ndim == 3 else frame
+        size = (gray.shape[1], gray.shape[0])
+        if self.image_size is not None and size != self.image_size:
+            # Views must all come from the same resolution
+            self.reset()
+
+        found, corners = cv2.findChessboardCorners(gray, self.pattern, flags=cv2.CALIB_CB_ADAPTIVE_THRESH | cv2.CALIB_CB_NORMALIZE_IMAGE)
+        if not found:
+            return False
+
+        criteria = (cv2.TERM_CRITERIA_EPS + cv2.TERM_CRITERIA_MAX_ITER, 30, 0.001)
+        corners = cv2.cornerSubPix(gray, corners, (11, 11), (-1, -1), criteria)
+        self.image_size = size
+        self._image_points.append(corners)
+        return True
+
+    def reset(self):
+        self.image_size = None
+        self._image_points = []
+
+    def calibrate(self):
+        """Returns (rms error in pixels, {"fx", "fy", "cx", "cy"} normalized, [k1, k2, p1, p2, k3])."""
+        if self.views < self.MIN_VIEWS:
+            raise ValueError(f"Need at least {self.MIN_VIEWS} checkerboard views, have {self.views}")
+
+        rms, camera_matrix, distortion, _, _ = cv2.calibrateCamera(
+            [self._object_points] * self.views, self._image_points, self.image_size, None, None)
+
+        width, height = self.image_size
+        intrinsics = {
+            "fx": camera_matrix[0, 0] / width,
+            "fy": camera_matrix[1, 1] / height,
+            "cx": camera_matrix[0, 2] / width,
+            "cy": camera_matrix[1, 2] / height,
+        }
+        return rms, intrinsics, distortion.ravel()[:5].tolist()
@@ -0,0 +1,175 @@
+import time
+from collections import deque
+from threading import Thread, Lock, Condition, Event
+
+import cv2
+
+from bufferpool import frame_pool
+
+class CameraStream:
+    """One camera (device index or URL) grabbed on its own thread.
+
+    The last few frames are kept with their monotonic grab time so frames from several cameras can be paired
+    by nearest timestamp without a slow camera ever blocking the others.
+
+    The stream runs at width x height; grab_still() briefly switches the device to a larger still mode on the
+    grab thread and back, so the preview can stay at a cheap resolution.
+    """
+
+    STILL_READS = 8  # reads allowed after a mode switch before giving up on the still size
+
+    def __init__(self, source, width, height, fps, history=4):
+        self.source = source
+        self.width = width
+        self.height = height
+        self.fps = fps
+
+        self.cap = None
+        self.running = False
+        self.frame_count = 0
+        self._frame_shape = None
+        self._thread = None
+        self._frames = deque(maxlen=history)  # (timestamp, frame)
+        self._frames_cond = Condition()
+        self._pending = {}
+        self._pending_lock = Lock()
+        self._still_request = None
+        self._still_unsupported = set()  # still sizes the device ignored, not retried until the stream changes
+        self.still_latency = None  # (switch to still, switch back) in seconds, for the last still
+
+    def open(self):
+        self._still_unsupported.clear()
+        self.cap = cv2.VideoCapture(self.source)
+        self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, self.width)
+        self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, self.height)
+        self.cap.set(cv2.CAP_PROP_FPS, self.fps)
+        return self.cap.isOpened()
+
+    def start(self):
+        self.running = True
+        self._thread = Thread(target=self._grab_loop, daemon=True)
+        self._thread.start()
+
+    def stop(self, wait=True):
+        self.running = False
+        with self._frames_cond:
+            self._frames_cond.notify_all()
+        if wait and self._thread:
+            self._thread.join()
+
+    def configure(self, prop, value):
+        # Applied by the grab thread, so the VideoCapture is never touched from two threads
+        with self._pending_lock:
+            self._pending[prop] = value
+
+    def _apply_pending(self):
+        with self._pending_lock:
+            if not self._pending:
+                return
+            pending = self._pending
+            self._pending = {}
+        # Another mode may support still sizes the previous one didn't
+        self._still_unsupported.clear()
+
+        for prop, value in pending.items():
+            self.cap.set(prop, value)
+            # Remembered so a still grab switches back to the current stream mode
+            if prop == cv2.CAP_PROP_FRAME_WIDTH:
+                self.width = value
+            elif prop == cv2.CAP_PROP_FRAME_HEIGHT:
+                self.height = value
+
+    def grab_still(self, width, height, timeout=5.0):
+        """Grab one frame at width x height as (timestamp, frame), (None, None) if the device can't deliver that size."""
+        if (width, height) in self._still_unsupported or not self.running:
+            return None, None
+
+        request = {"size": (width, height), "frame": None, "timestamp": None, "done": Event()}
+        with self._pending_lock:
+            self._still_request = request
+        if not request["done"].wait(timeout):
+            # Abandoned: don't let the grab thread switch modes later for a capture that already gave up
+            with self._pending_lock:
+                if self._still_request is request:
+                    self._still_request = None
+            return None, None
+        return request["timestamp"], request["frame"]
+
+    def _grab_still(self, request):
+        width, height = request["size"]
+        started = time.monotonic()
+
+        self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, width)
+        self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
+        # Take the first frame at the new size, the device may deliver a few old-mode frames first
+        other_size = False
+        for _ in range(self.STILL_READS):
+            ret, frame = self.cap.read()
+            if not ret:
+                continue
+            if frame.shape[1] == width and frame.shape[0] == height:
+                request["timestamp"] = time.monotonic()
+                request["frame"] = frame
+                break
+            other_size = True
+        switched = time.monotonic()
+
+        self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, self.width)
+        self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, self.height)
+        self.still_latency = (switched - started, time.monotonic() - switched)
+
+        # Failed reads (a USB hiccup) are retried next time, only a device that kept its own size is remembered
+        if request["frame"] is None and other_size:
+            self._still_unsupported.add((width, height))
+        request["done"].set()
+
+    def _grab_loop(self):
+        # Opening can take a while (network streams), do it here instead of on the caller's thread
+        if self.cap is None:
+            self.open()
+
+        while self.running:
+            self._apply_pending()
+
+            with self._pending_lock:
+                still_request, self._still_request = self._still_request, None
+            if still_request is not None:
+                self._grab_still(still_request)
+                self._frame_shape = None  # the stream mode may come back at a different size
+
+            # Decode into a pooled buffer; once the ring and the pipeline drop a frame its buffer is reused
+            if self._frame_shape is not None:
+                ret, frame = self.cap.read(frame_pool.acquire(self._frame_shape))
+            else:
+                ret, frame = self.cap.read()
+            timestamp = time.monotonic()
+            if not ret:
+                time.sleep(0.01)
+                continue
+            self._frame_shape = frame.shape
+
+            with self._frames_cond:
+                self._frames.append((timestamp, frame))
+                self.frame_count += 1
+                self._frames_cond.notify_all()
+
+        self.cap.release()
+
+    def latest(self):
+        with self._frames_cond:
+            return self._frames[-1] if self._frames else (None, None)
+
+    def wait_for_frame(self, after_count, timeout=0.1):
+        """Block until a frame newer than after_count arrives, returns (frame_count, timestamp, frame)."""
+        with self._frames_cond:
+            self._frames_cond.wait_for(lambda: self.frame_count > after_count or not self.running, timeout)
+            if self.frame_count <= after_count or not self._frames:
+                return after_count, None, None
+            timestamp, frame = self._frames[-1]
+            return self.frame_count, timestamp, frame
+
+    def nearest(self, timestamp):
+        with self._frames_cond:
+            if not self._frames:
+                return None, None
+            return min(self._frames, key=lambda item: abs(item[0] - timestamp))
@@ -0,0 +1,96 @@
+import cv2
+import numpy as np
+
+from bufferpool import frame_pool
+
+class Conform:
+    """Fits frames to the project resolution in a single resize pass.
+
+    Crop fills the frame and cuts the overflow, Letterbox fits the whole frame and pads with black, Scale
+    stretches. The crop/destination rectangles only depend on the sizes involved, so they are computed once
+    per (input size, output size) and reused for every frame.
+    """
+
+    MODES = ["Crop", "Letterbox", "Scale"]
+    INTERPOLATIONS = {
+        "Nearest": cv2.INTER_NEAREST,
+        "Linear": cv2.INTER_LINEAR,
+        "Area": cv2.INTER_AREA,
+        "Cubic": cv2.INTER_CUBIC,
+        "Lanczos": cv2.INTER_LANCZOS4,
+    }
+
+    def __init__(self, width, height, mode="Crop", interpolation="Area"):
+        if int(width) < 1 or int(height) < 1:
+            raise ValueError(f"Project resolution must be at least 1x1, got {width}x{height}")
+        self.width = int(width)
+        self.height = int(height)
+        self.mode = mode
+        self.interpolation = interpolation
+        self._plans = {}
+
+    def configure(self, mode=None, interpolation=None):
+        if mode is not None:
+            self.mode = mode
+        if interpolation is not None:
+            self.interpolation = interpolation
+        self._plans.clear()
+
+    @staticmethod
+    def _fit(width, height, box_width, box_height):
+        # Largest width x height rectangle fitting in the box, centered: (x, y, w, h)
+        scale = min(box_width / width, box_height / height)
+        fit_width, fit_height = max(1, round(width * scale)), max(1, round(height * scale))
+        return (box_width - fit_width) // 2, (box_height - fit_height) // 2, fit_width, fit_height
+
+    def plan(self, source_width, source_height, output_width=None, output_height=None):
+        """Returns (crop, dest): crop (x, y, w, h) on the source and dest (x, y, w, h) in the output."""
+        output_width = output_width or self.width
+        output_height = output_height or self.height
+        key = (source_width, source_height, output_width, output_height)
+        if key in self._plans:
+            return self._plans[key]
+
+        # The project canvas inside the output (the output can be a preview with a different aspect)
+        if (output_width, output_height) == (self.width, self.height):
+            canvas = (0, 0, output_width, output_height)
+        else:
+            canvas = self._fit(self.width, self.height, output_width, output_height)
+
+        crop = (0, 0, source_width, source_height)
+        dest = canvas
+        if self.mode == "Crop":
+            crop_x, crop_y, crop_width, crop_height = self._fit(self.width, self.height, source_width, source_height)
+            crop = (crop_x, crop_y, crop_width, crop_height)
+        elif self.mode == "Letterbox":
+            x, y, width, height = self._fit(source_width, source_height, canvas[2], canvas[3])
+            dest = (canvas[0] + x, canvas[1] + y, width, height)
+
+        self._plans[key] = (crop, dest)
+        return crop, dest
+
+    def apply(self, frame, out=None):
+        """Conform frame into out (a pooled buffer at project resolution when None)."""
+        if out is None:
+            out = frame_pool.acquire((self.height, self.width) + frame.shape[2:], frame.dtype)
+
+        output_height, output_width = out.shape[:2]
+        (crop_x, crop_y, crop_width, crop_height), (x, y, width, height) = self.plan(frame.shape[1], frame.shape[0], output_width, output_height)
+        source = frame[crop_y:crop_y + crop_height, crop_x:crop_x + crop_width]  # view, no copy
+        interpolation = self.INTERPOLATIONS.get(self.interpolation, cv2.INTER_AREA)
+
+        if (x, y, width, height) == (0, 0, output_width, output_height):
+            if source.shape[:2] == (output_height, output_width):
+                np.copyto(out, source)
+            else:
+                cv2.resize(source, (output_width, output_height), dst=out, interpolation=interpolation)
+            return out
+
+        # Black bars only where the picture doesn't cover, then the picture itself
+        out[:y] = 0
+        out[y + height:] = 0
+        out[y:y + height, :x] = 0
+        out[y:y + height, x + width:] = 0
+        resized = cv2.resize(source, (width, height), dst=frame_pool.acquire((height, width) + frame.shape[2:], frame.dtype), interpolation=interpolation)
+        np.copyto(out[y:y + height, x:x + width], resized)
+        return out
@@ -0,0 +1,197 @@
+import asyncio
+import json
+import os
+import socket
+import stat
+from threading import Thread, Event
+
+class ControlServer:
+    """Local control API for pedals and motion-control rigs.
+
+    Newline-delimited JSON over localhost TCP (or a Unix socket when a path is given). Each request is a
+    {"cmd": ...} object answered with one {"ok": ...} line. Commands that edit the project or the UI run on the
+    UI thread (App.call_on_ui) and are answered when done, the rest are dispatched straight from the event loop
+    into App methods that don't block (captures run on their own thread). After {"cmd": "subscribe"} the
+    connection also receives {"event": ...} lines, e.g. when a capture has been written.
+    """
+
+    UI_COMMANDS = {"delete", "undo", "redo", "play", "stop"}
+
+    def __init__(self, app, host="127.0.0.1", port=47110, unix_path=None):
+        self.app = app
+        self.host = host
+        self.port = port
+        self.unix_path = unix_path
+
+        self.loop = None
+        self._server = None
+        self._subscribers = set()
+        self._thread = None
+        self._started = Event()
+        self.error = None  # why the server couldn't listen, set by start()
+
+        self.commands = {
+            "capture": self._capture,
+            "delete": self._delete,
+            "undo": self._undo,
+            "redo": self._redo,
+            "play": self._play,
+            "stop": self._stop,
+            "status": self._status,
+            "subscribe": self._subscribe,
+        }
+
+    def start(self):
+        """Start listening, raises OSError when the address can't be bound."""
+        self.loop = asyncio.new_event_loop()
+        self._thread = Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+        self._started.wait()
+        if self.error is not None:
+            self._thread.join()
+            self.loop = None
+            raise self.error
+
+    def stop(self):
+        if self.loop is None:
+            return
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join()
+        self.loop = None
+
+    def publish(self, event, **data):
+        """Send an event to subscribed clients, safe to call from any thread."""
+        if self.loop is None or not self._subscribers:
+            return
+        line = (json.dumps(dict(data, event=event)) + "\n").encode()
+        self.loop.call_soon_threadsafe(self._broadcast, line)
+
+    def _broadcast(self, line):
+        for writer in list(self._subscribers):
+            if writer.is_closing():
+                self._subscribers.discard(writer)
+            else:
+                writer.write(line)
+
+    def _run(self):
+        asyncio.set_event_loop(self.loop)
+        try:
+            if self.unix_path and hasattr(socket, "AF_UNIX"):
+                # A stale socket file from a previous run would make the bind fail. Anything else at the path is
+                # left alone, the bind error is reported instead
+                try:
+                    if stat.S_ISSOCK(os.stat(self.unix_path).st_mode):
+                        os.unlink(self.unix_path)
+                except FileNotFoundError:
+                    pass
+                self._server = self.loop.run_until_complete(asyncio.start_unix_server(self._handle_client, self.unix_path))
+            else:
+                self._server = self.loop.run_until_complete(asyncio.start_server(self._handle_client, self.host, self.port))
+        except OSError as e:
+            self.error = e
+            self.loop.close()
+            return
+        finally:
+            self._started.set()
+
+        try:
+            self.loop.run_forever()
+        finally:
+            self._server.close()
+            # Drop client connections still waiting for a request
+            tasks = asyncio.all_tasks(self.loop)
+            for task in tasks:
+                task.cancel()
+            self.loop.run_until_complete(asyncio.gather(*tasks, return_exceptions=True))
+            self._subscribers.clear()
+            self.loop.close()
+
+    async def _handle_client(self, reader, writer):
+        sock = writer.get_extra_info("socket")
+        if sock is not None and sock.family != getattr(socket, "AF_UNIX", None):
+            # Small replies must not wait for Nagle
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                reply = self.dispatch(line, writer)
+                if not isinstance(reply, dict):
+                    # Queued on the UI thread, answered once it ran
+                    reply = await asyncio.wrap_future(reply)
+                writer.write((json.dumps(reply) + "\n").encode())
+                await writer.drain()
+        except (ConnectionError, asyncio.CancelledError):
+            # Client went away, or the server is shutting down
+            pass
+        finally:
+            self._subscribers.discard(writer)
+            writer.close()
+
+    def dispatch(self, line, writer=None):
+        """The reply dict, or a concurrent.futures.Future of it for commands queued on the UI thread."""
+        try:
+            request = json.loads(line)
+            command = self.commands[request["cmd"]]
+        except (ValueError, KeyError, TypeError):
+            return {"ok": False, "error": "unknown command"}
+
+        if request["cmd"] in self.UI_COMMANDS:
+            return self.app.call_on_ui(self._call, command, request, writer)
+        return self._call(command, request, writer)
+
+    @staticmethod
+    def _call(command, request, writer):
+        try:
+            return command(request, writer)
+        except Exception as e:
+            return {"ok": False, "error": str(e)}
+
+    # Commands
+
+    def _capture(self, request, _):
+        if not self.app.isopenProject:
+            return {"ok": False, "error": "no project open"}
+        # False means the previous capture is still being written
+        return {"ok": self.app.request_capture(request.get("metadata")), "error": None}
+
+    def _delete(self, request, _):
+        if not self.app.isopenProject or not self.app.ProMan.frames:
+            return {"ok": False, "error": "no frame to delete"}
+        frame_id = request.get("id") or self.app.ProMan.frames[-1]["id"]
+        self.app.delete_frame(None, None, frame_id)
+        return {"ok": True, "id": frame_id}
+
+    def _undo(self, request, _):
+        self.app.undo()
+        return {"ok": True}
+
+    def _redo(self, request, _):
+        self.app.redo()
+        return {"ok": True}
+
+    def _play(self, request, _):
+        return {"ok": self.app.start_playback(request.get("start", 0))}
+
+    def _stop(self, request, _):
+        self.app.stop_playback()
+        return {"ok": True}
+
+    def _status(self, request, _):
+        app = self.app
+        return {
+            "ok": True,
+            "project": app.ProMan.project_name if app.isopenProject else None,
+            "frames": len(app.ProMan.frames) if app.isopenProject else 0,
+            "camera": app.isInitCap,
+            "capturing": app.capture_lock.locked(),
+            "playing": app.playback is not None and app.playback.is_playing(),
+        }
+
+    def _subscribe(self, request, writer):
+        if writer is not None:
+            self._subscribers.add(writer)
+        return {"ok": True}
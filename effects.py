@@ -1,31 +1,740 @@
+import time
+from threading import Thread, Event, Lock
 import dearpygui.dearpygui as dpg
-from node import Node, InputNodeAttribute, OutputNodeAttribute, NodeType
+from node import Node, FrameNode, InputNodeAttribute, OutputNodeAttribute, NodeType
+from bufferpool import frame_pool
 import cv2
 import numpy as np
 
 # Tone mapping effect node
 
-class Temperature(Node):
+class Temperature(FrameNode):
+    inplace = True
+    stripe_safe = True
+
     @staticmethod
     def factory(name, data):
         return Temperature(name, data), NodeType.ProcessNode
 
+    @staticmethod
+    def process_frame(frame, params):
+        cv2.convertScaleAbs(frame, dst=frame, alpha=1, beta=params["temperature"])
+        return frame
+
+    def __init__(self, name, data):
+        super().__init__(name, data)
+
+        self.temp_in = dpg.generate_uuid()
+
+    def frame_parameters(self):
+        return {"temperature": dpg.get_value(self.temp_in)}
+
+    def custom_parameters(self):
+        dpg.add_text("Temperature")
+        dpg.add_input_float(label="Temperature", tag=self.temp_in, step=0, max_value=100, min_value=-100, default_value=0, width=150)
+
+
+# Multi-camera nodes
+
+def _match_size(frame, reference):
+    if frame.shape[:2] != reference.shape[:2]:
+        frame = cv2.resize(frame, (reference.shape[1], reference.shape[0]))
+    return frame
+
+class Blend(Node):
+    inplace = True
+
+    @staticmethod
+    def factory(name, data):
+        return Blend(name, data), NodeType.ProcessNode
+
+    def __init__(self, name, data):
+        super().__init__(name, data)
+
+        self.add_input_attribute(InputNodeAttribute("A"))
+        self.add_input_attribute(InputNodeAttribute("B"))
+        self.add_output_attribute(OutputNodeAttribute("Frame"))
+
+        self.mix_in = dpg.generate_uuid()
+
+    def custom(self):
+        dpg.add_text("Blend")
+        dpg.add_slider_float(label="Mix", tag=self.mix_in, max_value=1, min_value=0, default_value=0.5, width=150)
+
+    def execute(self, _):
+        frame_a = self._input_attributes[0].get_data()
+        frame_b = self._input_attributes[1].get_data()
+
+        if frame_a is None or frame_b is None:
+            output_frame = frame_a if frame_a is not None else frame_b
+        else:
+            # Written into A's buffer
+            output_frame = self.input_buffer(0)
+            mix = dpg.get_value(self.mix_in)
+            cv2.addWeighted(output_frame, 1 - mix, _match_size(frame_b, output_frame), mix, 0, dst=output_frame)
+
+        self._output_attributes[0].execute(output_frame)
+
+class Pick(Node):
+    @staticmethod
+    def factory(name, data):
+        return Pick(name, data), NodeType.ProcessNode
+
+    def __init__(self, name, data):
+        super().__init__(name, data)
+
+        self.add_input_attribute(InputNodeAttribute("A"))
+        self.add_input_attribute(InputNodeAttribute("B"))
+        self.add_output_attribute(OutputNodeAttribute("Frame"))
+
+        self.pick_in = dpg.generate_uuid()
+
+    def custom(self):
+        dpg.add_text("Pick")
+        dpg.add_radio_button(items=["A", "B"], tag=self.pick_in, default_value="A", horizontal=True)
+
+    def execute(self, _):
+        index = 0 if dpg.get_value(self.pick_in) == "A" else 1
+
+        self._output_attributes[0].execute(self._input_attributes[index].get_data())
+
+class SideBySide(Node):
+    @staticmethod
+    def factory(name, data):
+        return SideBySide(name, data), NodeType.ProcessNode
+
+    def __init__(self, name, data):
+        super().__init__(name, data)
+
+        self.add_input_attribute(InputNodeAttribute("Left"))
+        self.add_input_attribute(InputNodeAttribute("Right"))
+        self.add_output_attribute(OutputNodeAttribute("Frame"))
+
+    def custom(self):
+        dpg.add_text("Side by Side")
+
+    def execute(self, _):
+        left = self._input_attributes[0].get_data()
+        right = self._input_attributes[1].get_data()
+
+        if left is None or right is None:
+            output_frame = left if left is not None else right
+        else:
+            if right.shape[0] != left.shape[0]:
+                scale = left.shape[0] / right.shape[0]
+                right = cv2.resize(right, (round(right.shape[1] * scale), left.shape[0]))
+            output_frame = frame_pool.acquire((left.shape[0], left.shape[1] + right.shape[1]) + left.shape[2:], left.dtype)
+            cv2.hconcat([left, right], output_frame)
+
+        self._output_attributes[0].execute(output_frame)
+
+# Stabilization
+
+class Stabilize(Node):
+    @staticmethod
+    def factory(name, data):
+        return Stabilize(name, data), NodeType.ProcessNode
+
     def __init__(self, name, data):
         super().__init__(name, data)
 
         self.add_input_attribute(InputNodeAttribute("Frame"))
         self.add_output_attribute(OutputNodeAttribute("Frame"))
 
-        self.temp_in = dpg.generate_uuid()
+        self.width_in = dpg.generate_uuid()
+        self.shift_text = dpg.generate_uuid()
+
+        # Reference spectrum is computed once and reused, so each frame costs a single forward transform
+        self._reference_fft = None
+        self._window = None
+        self._analysis_size = None
+        self._set_reference = True
 
     def custom(self):
-        dpg.add_text("Temperature")
-        dpg.add_input_float(label="Temperature", tag=self.temp_in, step=0, max_value=100, min_value=-100, default_value=0, width=150)
+        dpg.add_text("Stabilize")
+        dpg.add_input_int(label="Analysis Width", tag=self.width_in, default_value=256, min_value=64, max_value=1024, min_clamped=True, max_clamped=True, step=0, width=150, callback=self.reset_reference)
+        dpg.add_button(label="Set Reference", callback=self.reset_reference)
+        dpg.add_text("Shift: -", tag=self.shift_text)
+
+    def reset_reference(self, *_):
+        self._set_reference = True
+        self.invalidate()
+
+    def _analysis_image(self, frame):
+        small = cv2.resize(frame, self._analysis_size, interpolation=cv2.INTER_AREA)
+        if small.ndim == 3:
+            small = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+        return np.float32(small) * self._window
 
     def execute(self, _):
         frame = self._input_attributes[0].get_data()
+        if frame is None:
+            self._output_attributes[0].execute(None)
+            return
+
+        height, width = frame.shape[:2]
+        analysis_width = min(dpg.get_value(self.width_in) or 256, width)
+        analysis_size = (analysis_width, max(8, round(height * analysis_width / width)))
+
+        if not self.capture_pass and (self._set_reference or self._analysis_size != analysis_size):
+            self._analysis_size = analysis_size
+            self._window = cv2.createHanningWindow(analysis_size, cv2.CV_32F)
+            self._reference_fft = np.fft.rfft2(self._analysis_image(frame))
+            self._set_reference = False
+            self._output_attributes[0].execute(frame)
+            return
 
-        output_frame = cv2.convertScaleAbs(frame, alpha=1, beta=dpg.get_value(self.temp_in))
+        if self._reference_fft is None or self._set_reference:
+            # Capture with no reference yet (or a reset pending): nothing to align to
+            self._output_attributes[0].execute(frame)
+            return
+
+        # A capture at another resolution (a still) is analysed at the reference's size, so the reference stays
+        analysis_size = self._analysis_size
+
+        # Phase correlation against the cached reference spectrum
+        cross_power = np.fft.rfft2(self._analysis_image(frame)) * np.conj(self._reference_fft)
+        cross_power /= np.abs(cross_power) + 1e-9
+        correlation = np.fft.irfft2(cross_power, s=self._window.shape)
+
+        peak_y, peak_x = np.unravel_index(np.argmax(correlation), correlation.shape)
+        rows, cols = correlation.shape
+
+        # Sub pixel peak from the 3x3 neighbourhood centroid (wrapping at the borders)
+        ys = [(peak_y + offset) % rows for offset in (-1, 0, 1)]
+        xs = [(peak_x + offset) % cols for offset in (-1, 0, 1)]
+        patch = np.maximum(correlation[np.ix_(ys, xs)], 0)
+        total = patch.sum() or 1.0
+        dy = peak_y + float((patch.sum(axis=1) * (-1, 0, 1)).sum() / total)
+        dx = peak_x + float((patch.sum(axis=0) * (-1, 0, 1)).sum() / total)
+
+        # Peaks past the middle are negative shifts
+        if dy > rows / 2:
+            dy -= rows
+        if dx > cols / 2:
+            dx -= cols
+
+        shift_x, shift_y = -dx * width / analysis_size[0], -dy * height / analysis_size[1]
+        if not self.capture_pass:
+            dpg.set_value(self.shift_text, f"Shift: {shift_x:.1f}, {shift_y:.1f} px")
+
+        matrix = np.float32([[1, 0, shift_x], [0, 1, shift_y]])
+        output_frame = cv2.warpAffine(frame, matrix, (width, height), dst=frame_pool.acquire_like(frame), borderMode=cv2.BORDER_REPLICATE)
 
         self._output_attributes[0].execute(output_frame)
 
+
+# Scopes inspector
+
+class Scopes(Node):
+    SAMPLE_WIDTH = 320  # scopes are computed on a frame subsampled to about this width
+    WAVEFORM_COLUMNS = 64
+    WAVEFORM_LEVELS = 32
+
+    @staticmethod
+    def factory(name, data):
+        return Scopes(name, data), NodeType.ProcessNode
+
+    def __init__(self, name, data):
+        super().__init__(name, data)
+
+        self.add_input_attribute(InputNodeAttribute("Frame"))
+        self.add_output_attribute(OutputNodeAttribute("Frame"))
+
+        self.rate_in = dpg.generate_uuid()
+        self.hist_x_axis = dpg.generate_uuid()
+        self.hist_y_axis = dpg.generate_uuid()
+        self.hist_series = [dpg.generate_uuid() for _ in range(3)]
+        self.wave_x_axis = dpg.generate_uuid()
+        self.wave_y_axis = dpg.generate_uuid()
+        self.wave_series = dpg.generate_uuid()
+        self.clip_text = dpg.generate_uuid()
+
+        # Latest sample waiting for the worker, older ones are simply replaced
+        self._sample = None
+        self._sample_lock = Lock()
+        self._sample_ready = Event()
+        self._last_sample_time = 0.0
+        self._stop_worker = Event()
+        self._worker = None  # started on the first frame, and again if the node is restored by undo
+
+    def custom(self):
+        dpg.add_text("Scopes")
+        dpg.add_input_float(label="Rate (Hz)", tag=self.rate_in, default_value=5, min_value=0.5, max_value=30, min_clamped=True, max_clamped=True, step=0, width=150)
+
+        bins = list(range(256))
+        with dpg.plot(label="Histogram", height=140, width=280, no_mouse_pos=True):
+            dpg.add_plot_axis(dpg.mvXAxis, tag=self.hist_x_axis, no_tick_labels=True)
+            dpg.set_axis_limits(self.hist_x_axis, 0, 255)
+            with dpg.plot_axis(dpg.mvYAxis, tag=self.hist_y_axis, no_tick_labels=True):
+                for series, label in zip(self.hist_series, ("B", "G", "R")):
+                    dpg.add_line_series(bins, [0] * 256, label=label, tag=series)
+
+        with dpg.plot(label="Waveform", height=140, width=280, no_mouse_pos=True):
+            dpg.add_plot_axis(dpg.mvXAxis, tag=self.wave_x_axis, no_tick_labels=True)
+            with dpg.plot_axis(dpg.mvYAxis, tag=self.wave_y_axis, no_tick_labels=True):
+                dpg.add_heat_series([0] * (self.WAVEFORM_COLUMNS * self.WAVEFORM_LEVELS), self.WAVEFORM_LEVELS, self.WAVEFORM_COLUMNS,
+                                    scale_min=0, scale_max=1, format="", tag=self.wave_series)
+
+        dpg.add_text("Clipped: -", tag=self.clip_text)
+
+    def close(self):
+        # The worker holds a reference to the node, stop it so deleted nodes don't linger
+        if self._worker is not None:
+            self._stop_worker.set()
+            self._sample_ready.set()
+            self._worker.join()
+            self._worker = None
+
+    def execute(self, _):
+        frame = self._input_attributes[0].get_data()
+
+        if self._worker is None:
+            self._stop_worker.clear()
+            self._worker = Thread(target=self._worker_loop, daemon=True)
+            self._worker.start()
+
+        # Pass the frame straight through, only hand a small subsampled copy to the worker now and then
+        now = time.monotonic()
+        if frame is not None and not self.capture_pass and now - self._last_sample_time >= 1.0 / (dpg.get_value(self.rate_in) or 5):
+            self._last_sample_time = now
+            step = max(1, frame.shape[1] // self.SAMPLE_WIDTH)
+            with self._sample_lock:
+                self._sample = np.ascontiguousarray(frame[::step, ::step])
+            self._sample_ready.set()
+
+        self._output_attributes[0].execute(frame)
+
+    def _worker_loop(self):
+        while not self._stop_worker.is_set():
+            self._sample_ready.wait()
+            self._sample_ready.clear()
+            if self._stop_worker.is_set():
+                break
+            with self._sample_lock:
+                sample, self._sample = self._sample, None
+            if sample is None:
+                continue
+
+            try:
+                self._update_scopes(sample)
+            except SystemError:
+                # Node was deleted from the editor
+                continue
+
+    def _update_scopes(self, sample):
+        if sample.ndim == 2:
+            sample = cv2.cvtColor(sample, cv2.COLOR_GRAY2BGR)
+
+        # RGB histograms, normalized so the plots keep a fixed scale
+        for channel, series in enumerate(self.hist_series):
+            histogram = cv2.calcHist([sample], [channel], None, [256], [0, 256]).ravel()
+            histogram /= max(histogram.max(), 1.0)
+            dpg.set_value(series, [list(range(256)), histogram.tolist()])
+
+        # Luma waveform: distribution of luma levels for each band of columns
+        luma = cv2.cvtColor(sample, cv2.COLOR_BGR2GRAY)
+        columns = np.minimum(np.arange(luma.shape[1]) * self.WAVEFORM_COLUMNS // luma.shape[1], self.WAVEFORM_COLUMNS - 1)
+        levels = luma.astype(np.int32) * self.WAVEFORM_LEVELS // 256
+        waveform = np.zeros((self.WAVEFORM_LEVELS, self.WAVEFORM_COLUMNS), np.float32)
+        np.add.at(waveform, (levels, np.broadcast_to(columns, levels.shape)), 1)
+        waveform /= max(waveform.max(), 1.0)
+        dpg.set_value(self.wave_series, [np.flipud(waveform).ravel().tolist()])
+
+        # Clipping: pixels with any channel at the limits
+        total = sample.shape[0] * sample.shape[1]
+        highlights = np.count_nonzero((sample == 255).any(axis=2)) * 100.0 / total
+        shadows = np.count_nonzero((sample == 0).any(axis=2)) * 100.0 / total
+        dpg.set_value(self.clip_text, f"Clipped: {highlights:.2f}% highlights, {shadows:.2f}% shadows")
+
+# Chroma key
+
+class ChromaKey(Node):
+    MODES = ["YCrCb", "HSV", "Difference"]
+
+    @staticmethod
+    def factory(name, data):
+        return ChromaKey(name, data), NodeType.ProcessNode
+
+    def __init__(self, name, data):
+        super().__init__(name, data)
+
+        self.add_input_attribute(InputNodeAttribute("Frame"))
+        self.add_input_attribute(InputNodeAttribute("Background"))
+        self.add_output_attribute(OutputNodeAttribute("Frame"))
+        self.add_output_attribute(OutputNodeAttribute("Matte"))
+
+        self.mode_in = dpg.generate_uuid()
+        self.screen_in = dpg.generate_uuid()
+        self.tolerance_in = dpg.generate_uuid()
+        self.softness_in = dpg.generate_uuid()
+        self.spill_in = dpg.generate_uuid()
+        self.plate_text = dpg.generate_uuid()
+
+        # Clean plate for the difference key, kept at the working resolution
+        self._clean_plate = None
+        self._grab_plate = False
+
+    def custom(self):
+        dpg.add_text("Chroma Key")
+        dpg.add_combo(label="Mode", items=self.MODES, tag=self.mode_in, default_value="YCrCb", width=150)
+        dpg.add_radio_button(items=["Green", "Blue"], tag=self.screen_in, default_value="Green", horizontal=True)
+        dpg.add_slider_int(label="Tolerance", tag=self.tolerance_in, default_value=40, min_value=1, max_value=128, width=150)
+        dpg.add_slider_int(label="Softness", tag=self.softness_in, default_value=3, min_value=0, max_value=20, width=150)
+        dpg.add_checkbox(label="Spill Suppression", tag=self.spill_in, default_value=True)
+        dpg.add_button(label="Capture Clean Plate", callback=self.capture_clean_plate)
+        dpg.add_text("Clean plate: none", tag=self.plate_text)
+
+    def capture_clean_plate(self, *_):
+        self._grab_plate = True
+        self.invalidate()
+
+    def _key_mask(self, frame, mode, green, tolerance):
+        # 255 where the pixel belongs to the screen (or matches the clean plate)
+        if mode == "Difference":
+            plate = self._clean_plate
+            if plate is None:
+                return None
+            if plate.shape != frame.shape:
+                plate = cv2.resize(plate, (frame.shape[1], frame.shape[0]), interpolation=cv2.INTER_AREA)
+                if not self.capture_pass:
+                    # Captures at another size (stills) use a resized copy, the live plate stays
+                    self._clean_plate = plate
+            difference = cv2.cvtColor(cv2.absdiff(frame, plate), cv2.COLOR_BGR2GRAY)
+            return cv2.threshold(difference, tolerance // 4, 255, cv2.THRESH_BINARY_INV)[1]
+
+        if mode == "HSV":
+            hsv = cv2.cvtColor(frame, cv2.COLOR_BGR2HSV)
+            hue = 60 if green else 120
+            hue_range = max(1, tolerance // 4)
+            return cv2.inRange(hsv, (hue - hue_range, 60, 40), (hue + hue_range, 255, 255))
+
+        # YCrCb: green screen is low Cr and low Cb, blue screen low Cr and high Cb. Higher tolerance moves the
+        # bounds toward neutral (128) but never onto it, greys, white and black are never keyed
+        ycrcb = cv2.cvtColor(frame, cv2.COLOR_BGR2YCrCb)
+        margin = max(1, (128 - tolerance) // 4)
+        if green:
+            return cv2.inRange(ycrcb, (16, 0, 0), (235, 128 - margin, 128 - margin))
+        return cv2.inRange(ycrcb, (16, 0, 128 + margin), (235, 128 - margin, 255))
+
+    def execute(self, _):
+        frame = self._input_attributes[0].get_data()
+        if frame is None:
+            self._output_attributes[0].execute(None)
+            self._output_attributes[1].execute(None)
+            return
+
+        if self._grab_plate and not self.capture_pass:
+            self._clean_plate = frame_pool.copy(frame)
+            self._grab_plate = False
+            dpg.set_value(self.plate_text, f"Clean plate: {frame.shape[1]}x{frame.shape[0]}")
+
+        mode = dpg.get_value(self.mode_in)
+        green = dpg.get_value(self.screen_in) == "Green"
+        mask = self._key_mask(frame, mode, green, dpg.get_value(self.tolerance_in))
+        if mask is None:
+            # Difference key without a clean plate yet
+            self._output_attributes[0].execute(frame)
+            self._output_attributes[1].execute(None)
+            return
+
+        # Alpha: 255 keeps the foreground, soft edge from a box blur of the hard matte
+        alpha = cv2.bitwise_not(mask, dst=mask)
+        softness = dpg.get_value(self.softness_in)
+        if softness > 0:
+            cv2.blur(alpha, (softness * 2 + 1, softness * 2 + 1), dst=alpha)
+
+        foreground = frame
+        if dpg.get_value(self.spill_in) and mode != "Difference":
+            # Clamp the screen channel to the max of the other two, on a pooled copy
+            foreground = frame_pool.copy(frame)
+            key_channel, other_a, other_b = (1, 0, 2) if green else (0, 1, 2)
+            limit = np.maximum(foreground[..., other_a], foreground[..., other_b])
+            np.minimum(foreground[..., key_channel], limit, out=foreground[..., key_channel])
+
+        background = self._input_attributes[1].get_data()
+        if background is None:
+            output_frame = cv2.multiply(foreground, cv2.cvtColor(alpha, cv2.COLOR_GRAY2BGR), scale=1 / 255.0, dst=frame_pool.acquire_like(frame))
+        else:
+            background = _match_size(background, frame)
+            weights = np.multiply(alpha, 1 / 255.0, dtype=np.float32)
+            output_frame = cv2.blendLinear(foreground, background, weights, 1.0 - weights, dst=frame_pool.acquire_like(frame))
+
+        self._output_attributes[0].execute(output_frame)
+        self._output_attributes[1].execute(alpha)
+
+# Lens correction
+
+class LensCorrection(Node):
+    INTRINSICS = [("fx", 0.8), ("fy", 1.4), ("cx", 0.5), ("cy", 0.5)]  # normalized to the frame size
+    DISTORTION = ["k1", "k2", "p1", "p2", "k3"]
+
+    @staticmethod
+    def factory(name, data):
+        return LensCorrection(name, data), NodeType.ProcessNode
+
+    def __init__(self, name, data):
+        super().__init__(name, data)
+
+        self.add_input_attribute(InputNodeAttribute("Frame"))
+        self.add_output_attribute(OutputNodeAttribute("Frame"))
+
+        self.intrinsic_in = {name: dpg.generate_uuid() for name, _ in self.INTRINSICS}
+        self.distortion_in = {name: dpg.generate_uuid() for name in self.DISTORTION}
+        self.balance_in = dpg.generate_uuid()
+        self.pattern_in = dpg.generate_uuid()
+        self.calibration_text = dpg.generate_uuid()
+
+        # Remap tables for the last (size, parameters), rebuilt only when either changes
+        self._maps_key = None
+        self._maps = None
+
+        self._calibration = None
+        self._add_view = False
+
+    def custom(self):
+        dpg.add_text("Lens Correction")
+        for name, default in self.INTRINSICS:
+            dpg.add_input_float(label=name, tag=self.intrinsic_in[name], default_value=default, step=0, format="%.4f", width=150)
+        for name in self.DISTORTION:
+            dpg.add_input_float(label=name, tag=self.distortion_in[name], default_value=0, step=0, format="%.5f", width=150)
+        dpg.add_slider_float(label="Balance", tag=self.balance_in, default_value=0, min_value=0, max_value=1, width=150)
+
+        dpg.add_text("Calibration")
+        dpg.add_input_intx(label="Inner Corners", size=2, tag=self.pattern_in, default_value=[9, 6, 0, 0], width=150)
+        with dpg.group(horizontal=True):
+            dpg.add_button(label="Add View", callback=self.add_view)
+            dpg.add_button(label="Calibrate", callback=self.calibrate)
+            dpg.add_button(label="Reset", callback=self.reset_calibration)
+        dpg.add_text("Views: 0", tag=self.calibration_text)
+
+    def parameters(self):
+        intrinsics = [dpg.get_value(self.intrinsic_in[name]) for name, _ in self.INTRINSICS]
+        distortion = [dpg.get_value(self.distortion_in[name]) for name in self.DISTORTION]
+        return intrinsics, distortion, dpg.get_value(self.balance_in)
+
+    def add_view(self, *_):
+        # The next frame through the node is used for the view
+        self._add_view = True
+        self.invalidate()
+
+    def reset_calibration(self, *_):
+        self._calibration = None
+        dpg.set_value(self.calibration_text, "Views: 0")
+
+    def _detect_view(self, frame):
+        from calibration import CheckerboardCalibration
+
+        pattern = tuple(dpg.get_value(self.pattern_in)[:2])
+        if self._calibration is None or self._calibration.pattern != pattern:
+            self._calibration = CheckerboardCalibration(pattern)
+
+        found = self._calibration.add_view(frame)
+        dpg.set_value(self.calibration_text, f"Views: {self._calibration.views}" + ("" if found else " (board not found)"))
+
+    def calibrate(self, *_):
+        if self._calibration is None:
+            return
+
+        def worker():
+            try:
+                rms, intrinsics, distortion = self._calibration.calibrate()
+            except (ValueError, cv2.error) as e:
+                dpg.set_value(self.calibration_text, str(e))
+                return
+
+            for name, value in intrinsics.items():
+                dpg.set_value(self.intrinsic_in[name], value)
+            for name, value in zip(self.DISTORTION, distortion):
+                dpg.set_value(self.distortion_in[name], value)
+            dpg.set_value(self.calibration_text, f"Views: {self._calibration.views}, error {rms:.3f} px")
+
+        # Solving takes a while with many views, keep it off the UI and capture threads
+        Thread(target=worker, daemon=True).start()
+
+    def _remap_tables(self, width, height):
+        intrinsics, distortion, balance = self.parameters()
+        key = (width, height, tuple(intrinsics), tuple(distortion), balance)
+        if key == self._maps_key:
+            return self._maps
+
+        fx, fy, cx, cy = intrinsics
+        camera_matrix = np.array([[fx * width, 0, cx * width], [0, fy * height, cy * height], [0, 0, 1]], np.float64)
+        distortion = np.array(distortion, np.float64)
+        new_matrix, _ = cv2.getOptimalNewCameraMatrix(camera_matrix, distortion, (width, height), balance)
+        # Fixed-point tables: half the memory of float maps and the fastest remap path
+        maps = cv2.initUndistortRectifyMap(camera_matrix, distortion, None, new_matrix, (width, height), cv2.CV_16SC2)
+        if not self.capture_pass:
+            # Tables for a capture at another size (a still) are used once, the live ones stay cached
+            self._maps = maps
+            self._maps_key = key
+        return maps
+
+    def execute(self, _):
+        frame = self._input_attributes[0].get_data()
+
+        if frame is not None and self._add_view and not self.capture_pass:
+            self._add_view = False
+            Thread(target=self._detect_view, args=(frame_pool.copy(frame),), daemon=True).start()
+
+        if frame is None or not any(self.parameters()[1]):
+            self._output_attributes[0].execute(frame)
+            return
+
+        map_xy, map_fraction = self._remap_tables(frame.shape[1], frame.shape[0])
+        output_frame = cv2.remap(frame, map_xy, map_fraction, cv2.INTER_LINEAR, dst=frame_pool.acquire_like(frame))
+        self._output_attributes[0].execute(output_frame)
+
+# 3D LUT grading
+
+class LUT3D(Node):
+    QUALITIES = ["Fast", "Trilinear"]  # for the live preview, captures are always trilinear
+
+    @staticmethod
+    def factory(name, data):
+        return LUT3D(name, data), NodeType.ProcessNode
+
+    def __init__(self, name, data):
+        super().__init__(name, data)
+
+        self.add_input_attribute(InputNodeAttribute("Frame"))
+        self.add_output_attribute(OutputNodeAttribute("Frame"))
+
+        self.path_in = dpg.generate_uuid()
+        self.quality_in = dpg.generate_uuid()
+        self.file_dialog = dpg.generate_uuid()
+        self.status_text = dpg.generate_uuid()
+
+        self._lut_path = None
+        self._lut = None
+
+    def custom(self):
+        dpg.add_text("3D LUT")
+        dpg.add_input_text(label="File", tag=self.path_in, width=150, on_enter=True)
+        dpg.add_button(label="Browse", callback=self.browse)
+        dpg.add_combo(label="Preview Quality", items=self.QUALITIES, tag=self.quality_in, default_value="Fast", width=150)
+        dpg.add_text("No LUT loaded", tag=self.status_text)
+
+    def browse(self, *_):
+        # Created on first use, file dialogs can't live inside the node
+        if not dpg.does_item_exist(self.file_dialog):
+            with dpg.file_dialog(label="Open LUT", tag=self.file_dialog, show=False, width=600, height=400,
+                                 callback=lambda _, data: dpg.set_value(self.path_in, data["file_path_name"])):
+                dpg.add_file_extension(".cube")
+        dpg.show_item(self.file_dialog)
+
+    def _load(self, path):
+        from lut import load_cube
+
+        # Parsed LUTs are shared across nodes, so switching between looks only parses a file once
+        self._lut_path = path
+        self._lut = None
+        if not path:
+            dpg.set_value(self.status_text, "No LUT loaded")
+            return
+        try:
+            self._lut = load_cube(path)
+        except (OSError, ValueError) as e:
+            dpg.set_value(self.status_text, f"Can't load LUT: {e}")
+            return
+        dpg.set_value(self.status_text, f"{self._lut.title or 'LUT'} ({self._lut.size}^3)")
+
+    def execute(self, _):
+        frame = self._input_attributes[0].get_data()
+
+        path = dpg.get_value(self.path_in)
+        if path != self._lut_path:
+            self._load(path)
+
+        if frame is None or self._lut is None or frame.ndim != 3 or frame.dtype != np.uint8:
+            self._output_attributes[0].execute(frame)
+            return
+
+        output_frame = frame_pool.acquire_like(frame)
+        if dpg.get_value(self.quality_in) == "Fast" and not self.capture_pass:
+            self._lut.apply_baked(frame, output_frame)
+        else:
+            self._lut.apply(frame, output_frame)
+        self._output_attributes[0].execute(output_frame)
+
+# Focus assist
+
+class FocusAssist(Node):
+    COLORS = {"Red": (0, 0, 255), "Green": (0, 255, 0), "Blue": (255, 0, 0), "White": (255, 255, 255)}
+
+    @staticmethod
+    def factory(name, data):
+        return FocusAssist(name, data), NodeType.ProcessNode
+
+    def __init__(self, name, data):
+        super().__init__(name, data)
+
+        self.add_input_attribute(InputNodeAttribute("Frame"))
+        self.add_output_attribute(OutputNodeAttribute("Frame"))
+
+        self.threshold_in = dpg.generate_uuid()
+        self.color_in = dpg.generate_uuid()
+        self.width_in = dpg.generate_uuid()
+        self.peaking_in = dpg.generate_uuid()
+        self.score_text = dpg.generate_uuid()
+
+        # (mask at analysis size, color) of the last live frame, drawn on the preview only
+        self._peaking = None
+
+    def custom(self):
+        dpg.add_text("Focus Assist")
+        dpg.add_checkbox(label="Peaking", tag=self.peaking_in, default_value=True)
+        dpg.add_slider_int(label="Threshold", tag=self.threshold_in, default_value=40, min_value=1, max_value=255, width=150)
+        dpg.add_combo(label="Color", items=list(self.COLORS), tag=self.color_in, default_value="Red", width=150)
+        dpg.add_input_int(label="Analysis Width", tag=self.width_in, default_value=480, min_value=64, max_value=1920, min_clamped=True, max_clamped=True, step=0, width=150)
+        dpg.add_text("Sharpness: -", tag=self.score_text)
+
+    def execute(self, _):
+        frame = self._input_attributes[0].get_data()
+        if frame is None:
+            self._peaking = None
+            self._output_attributes[0].execute(None)
+            return
+
+        # The frame passes through untouched, captures never get the overlay
+        if self.capture_pass:
+            self._output_attributes[0].execute(frame)
+            return
+
+        started = time.perf_counter()
+
+        # Edge energy on a small grayscale copy, the full frame is only touched by the masked overlay
+        analysis_width = min(dpg.get_value(self.width_in), frame.shape[1])
+        analysis_height = max(1, round(frame.shape[0] * analysis_width / frame.shape[1]))
+        small = cv2.resize(frame, (analysis_width, analysis_height), interpolation=cv2.INTER_AREA)
+        if small.ndim == 3:
+            small = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+        laplacian = cv2.Laplacian(small, cv2.CV_16S, ksize=3)
+
+        # Variance of the Laplacian: higher is sharper, comparable between takes of the same framing
+        _, deviation = cv2.meanStdDev(laplacian)
+        score = float(deviation[0, 0]) ** 2
+
+        self._peaking = None
+        if dpg.get_value(self.peaking_in) and frame.ndim == 3:
+            edges = cv2.convertScaleAbs(laplacian)
+            mask = cv2.threshold(edges, dpg.get_value(self.threshold_in), 255, cv2.THRESH_BINARY)[1]
+            self._peaking = (mask, self.COLORS[dpg.get_value(self.color_in)])
+
+        elapsed = (time.perf_counter() - started) * 1000
+        dpg.set_value(self.score_text, f"Sharpness: {score:.0f}  ({elapsed:.1f} ms)")
+
+        self._output_attributes[0].execute(frame)
+
+    def draw_preview(self, preview, conform):
+        peaking = self._peaking
+        if peaking is None:
+            return
+
+        # The mask goes through the same crop/letterbox as the frame, at preview size
+        mask, color = peaking
+        mask = conform.apply(mask, out=frame_pool.acquire(preview.shape[:2]))
+
+        # Paint the color over the peaking pixels: clear them, then add the color, both masked
+        cv2.subtract(preview, (255, 255, 255, 0), dst=preview, mask=mask)
+        cv2.add(preview, color + (0,), dst=preview, mask=mask)
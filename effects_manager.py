@@ -1,8 +1,10 @@
+import ast
+import cv2
 import dearpygui.dearpygui as dpg
 from node import (NodeEditor, DragSourceContainer, Node,
-                  DragSource, InputNodeAttribute, OutputNodeAttribute,
+                  DragSource, DragSourceHeader, InputNodeAttribute, OutputNodeAttribute,
                   NodeType)
-import effects
+from plugins import discover_effects
 
 class CVSource(Node):
     @staticmethod
@@ -14,11 +16,76 @@ class CVSource(Node):
 
         self.add_output_attribute(OutputNodeAttribute("Frame"))
 
+        self.camera_in = dpg.generate_uuid()
+        self.url_in = dpg.generate_uuid()
+        self.tolerance_in = dpg.generate_uuid()
+
+        # Last emitted frame and its version, re-emitted while the scene is unchanged
+        self._last_frame = None
+        self._last_version = None
+        self._url = ""  # URL as of the last Enter
+
     def custom(self):
         dpg.add_text("CV Source")
+        # data is the app camera list, "Default" follows the camera chosen in Preferences
+        dpg.add_combo(label="Camera", items=["Default"] + [str(camera) for camera in self._data or []], default_value="Default", tag=self.camera_in, width=150)
+        # Applied on Enter: the camera thread reopens the stream whenever the key changes, and the widget's
+        # value follows every keystroke
+        dpg.add_input_text(label="URL (Network)", tag=self.url_in, width=150, on_enter=True, callback=self._apply_url)
+        dpg.add_input_float(label="Static Tolerance", tag=self.tolerance_in, default_value=0.0, min_value=0, min_clamped=True, step=0, width=150)
+
+    def _apply_url(self, _, value):
+        self._url = value.strip()
+
+    def set_state(self, state):
+        super().set_state(state)
+        if dpg.does_item_exist(self.url_in):
+            self._url = dpg.get_value(self.url_in).strip()
+
+    @property
+    def camera_key(self):
+        value = dpg.get_value(self.camera_in)
+        if not value or value == "Default":
+            return None
+
+        camera_id = ast.literal_eval(value)[0]
+        if camera_id == -1:
+            return self._url or None
+        return camera_id
+
+    def _unchanged(self, frame):
+        last = self._last_frame
+        if last is None or last.shape != frame.shape or last.dtype != frame.dtype:
+            return False
+
+        tolerance = dpg.get_value(self.tolerance_in)
+        if tolerance <= 0:
+            return cv2.norm(frame, last, cv2.NORM_INF) == 0
+
+        # Conservative: the scene only counts as static when no 8x8 block changed by more than the tolerance on
+        # average, so a small local change (a puppet's hand) always gets through
+        difference = cv2.absdiff(frame, last)
+        blocks = cv2.resize(difference, (max(1, frame.shape[1] // 8), max(1, frame.shape[0] // 8)), interpolation=cv2.INTER_AREA)
+        return blocks.max() <= tolerance
 
     def process(self, frame):
+        if frame is None:
+            self._output_attributes[0].execute(None)
+            return
+
+        if self.capture_pass:
+            # Captures always see the frame they were given, with its own version
+            self._output_attributes[0].execute(frame)
+            return
+
+        # Unchanged scene: re-emit the previous frame and version so the downstream graph is served from cache
+        if frame is self._last_frame or self._unchanged(frame):
+            self._output_attributes[0].execute(self._last_frame, self._last_version)
+            return
+
+        self._last_frame = frame
         self._output_attributes[0].execute(frame)
+        self._last_version = self._output_attributes[0]._version
 
 class CVSink(Node):
     @staticmethod
@@ -49,13 +116,21 @@ class EffectsManager:
         self.left_panel = dpg.generate_uuid()
         self.right_panel = dpg.generate_uuid()
 
-        self.node_editor = NodeEditor()
+        self.node_editor = NodeEditor(app.history)
 
-        self.IO_container.add_drag_source(DragSource("CV Source", CVSource.factory, None))
+        self.IO_container.add_drag_source(DragSource("CV Source", CVSource.factory, app.camera_list))
         self.IO_container.add_drag_source(DragSource("CV Sink", CVSink.factory, None))
 
-        # effect
-        self.effects_contaniar.add_drag_source(DragSource("Temperature", effects.Temperature.factory, None))
+        # effect, only metadata here: each effect module is imported when its node is first dropped
+        self.effects = discover_effects(app.system_folder / "plugins")
+        categories = {}
+        for effect in self.effects:
+            categories.setdefault(effect.category, []).append(effect)
+
+        for category, category_effects in categories.items():
+            self.effects_contaniar.add_drag_source(DragSourceHeader(category))
+            for effect in category_effects:
+                self.effects_contaniar.add_drag_source(DragSource(effect.name, effect.factory, None, effect.parameters))
 
 
     def widget(self, parent):
@@ -0,0 +1,208 @@
+import math
+import queue
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
+
+import cv2
+import dearpygui.dearpygui as dpg
+import numpy as np
+
+THUMBNAIL_SIZE = (160, 90)
+
+def make_thumbnail(image):
+    return cv2.resize(image, THUMBNAIL_SIZE, interpolation=cv2.INTER_AREA)
+
+def save_thumbnail(path, image):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    cv2.imwrite(str(path), make_thumbnail(image), [cv2.IMWRITE_JPEG_QUALITY, 85])
+
+class _Slot:
+    # One row of the strip: a texture and widgets that get rebound to whichever frame scrolls into view
+    def __init__(self, panel, parent):
+        self.frame_id = None
+        self.file = None
+        self.texture = dpg.add_raw_texture(THUMBNAIL_SIZE[0], THUMBNAIL_SIZE[1], panel.placeholder,
+                                           format=dpg.mvFormat_Float_rgb, parent=panel.texture_registry)
+
+        with dpg.group(horizontal=True, parent=parent, show=False) as self.row:
+            dpg.add_image(self.texture)
+            with dpg.group():
+                self.label = dpg.add_text("")
+                self.delete_button = dpg.add_button(label="Delete", callback=panel.app.delete_frame)
+                with dpg.group(horizontal=True):
+                    self.up_button = dpg.add_button(label="Up", callback=panel.app.move_frame)
+                    self.down_button = dpg.add_button(label="Down", callback=panel.app.move_frame)
+
+class FramesPanel:
+    """Virtualized frame strip.
+
+    Only the rows in view (plus a margin) exist as widgets and textures; scrolling rebinds them to other
+    frames. Thumbnails are decoded on a thread pool, preferably from the small JPEGs in the project's thumbs
+    folder, and kept in a bounded LRU cache.
+    """
+
+    MARGIN_ROWS = 2
+    ROW_PADDING = 8
+
+    def __init__(self, app, parent, cache_size=512):
+        self.app = app
+        self.parent = parent
+        self.row_height = THUMBNAIL_SIZE[1] + self.ROW_PADDING
+        self.placeholder = np.full(THUMBNAIL_SIZE[0] * THUMBNAIL_SIZE[1] * 3, 0.2, np.float32)
+
+        self.cache_size = cache_size
+        self._cache = OrderedDict()  # file -> (float32 texture data, last use), least recently used first
+        self._cache_lock = Lock()
+        self._pending = set()
+        self._loaded = queue.Queue()
+        self._loader = ThreadPoolExecutor(max_workers=2, thread_name_prefix="thumbnails")
+
+        self._slots = []
+        self._frames = []
+        self._first_row = None
+        self._project = None
+
+        self.texture_registry = dpg.add_texture_registry()
+        with dpg.child_window(parent=parent, border=False) as self.list_window:
+            self.top_spacer = dpg.add_spacer(height=0)
+            self.rows = dpg.add_group()
+            self.bottom_spacer = dpg.add_spacer(height=0)
+
+    # -------------- data --------------
+
+    def set_frames(self, project, frames):
+        if project is not self._project:
+            self._project = project
+            with self._cache_lock:
+                self._cache.clear()
+            self._pending.clear()
+        self._frames = frames
+        self._first_row = None  # force a rebind
+        self.update()
+
+    def forget(self, file):
+        with self._cache_lock:
+            self._cache.pop(file, None)
+
+    def cache_bytes(self):
+        with self._cache_lock:
+            return sum(data.nbytes for data, _ in self._cache.values())
+
+    def texture_bytes(self):
+        # Row textures are kept for reuse, only as many as fit in the view
+        return (len(self._slots) + 1) * self.placeholder.nbytes
+
+    # Memory budget interface (see memory.py), only the decoded thumbnails can be evicted
+
+    def memory_usage(self):
+        return self.cache_bytes()
+
+    def oldest_access(self):
+        with self._cache_lock:
+            return next(iter(self._cache.values()))[1] if self._cache else None
+
+    def evict_oldest(self):
+        # Drop the least recently used thumbnail, returns the bytes freed
+        with self._cache_lock:
+            if not self._cache:
+                return 0
+            _, (data, _) = self._cache.popitem(last=False)
+            return data.nbytes
+
+    def _cached(self, file):
+        with self._cache_lock:
+            entry = self._cache.get(file)
+            if entry is None:
+                return None
+            self._cache[file] = (entry[0], time.monotonic())
+            self._cache.move_to_end(file)
+            return entry[0]
+
+    def _load(self, project, frame):
+        # Runs on the loader pool
+        thumbnail_file = project.thumbnail_path(frame)
+        image = cv2.imread(str(thumbnail_file)) if thumbnail_file.exists() else None
+        if image is None:
+            image = cv2.imread(str(project.frame_path(frame)), cv2.IMREAD_REDUCED_COLOR_2)
+            if image is None:
+                return frame["file"], None
+            save_thumbnail(thumbnail_file, image)
+            image = make_thumbnail(image)
+        elif image.shape[1::-1] != THUMBNAIL_SIZE:
+            image = make_thumbnail(image)
+
+        data = np.multiply(cv2.cvtColor(image, cv2.COLOR_BGR2RGB).reshape(-1), 1 / 255.0, dtype=np.float32)
+        with self._cache_lock:
+            self._cache[frame["file"]] = (data, time.monotonic())
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return frame["file"], data
+
+    def _request(self, frame):
+        if frame["file"] in self._pending:
+            return
+        self._pending.add(frame["file"])
+        future = self._loader.submit(self._load, self._project, frame)
+        future.add_done_callback(lambda f: self._loaded.put(f.result() if f.exception() is None else (frame["file"], None)))
+
+    # -------------- view --------------
+
+    def _ensure_slots(self, count):
+        while len(self._slots) < count:
+            self._slots.append(_Slot(self, self.rows))
+
+    def _bind(self, slot, index):
+        if index >= len(self._frames):
+            slot.frame_id = None
+            slot.file = None
+            dpg.hide_item(slot.row)
+            return
+
+        frame = self._frames[index]
+        dpg.show_item(slot.row)
+        dpg.set_value(slot.label, f"#{index + 1}")
+        dpg.set_item_user_data(slot.delete_button, frame["id"])
+        dpg.set_item_user_data(slot.up_button, (frame["id"], -1))
+        dpg.set_item_user_data(slot.down_button, (frame["id"], 1))
+
+        if slot.file != frame["file"]:
+            slot.file = frame["file"]
+            data = self._cached(frame["file"])
+            if data is None:
+                dpg.set_value(slot.texture, self.placeholder)
+                self._request(frame)
+            else:
+                dpg.set_value(slot.texture, data)
+        slot.frame_id = frame["id"]
+
+    def update(self):
+        """Called every UI tick: rebinds rows after scrolling and shows thumbnails that finished loading."""
+        while not self._loaded.empty():
+            file, data = self._loaded.get_nowait()
+            self._pending.discard(file)
+            if data is None:
+                continue
+            for slot in self._slots:
+                if slot.file == file:
+                    dpg.set_value(slot.texture, data)
+
+        view_height = max(dpg.get_item_rect_size(self.list_window)[1], self.row_height)
+        visible_rows = math.ceil(view_height / self.row_height) + 2 * self.MARGIN_ROWS
+        first_row = max(0, int(dpg.get_y_scroll(self.list_window) // self.row_height) - self.MARGIN_ROWS)
+        first_row = min(first_row, max(0, len(self._frames) - 1))
+
+        if first_row == self._first_row and len(self._slots) >= visible_rows:
+            return
+        self._first_row = first_row
+
+        self._ensure_slots(visible_rows)
+        for offset, slot in enumerate(self._slots):
+            # Slots beyond the visible count (window got smaller) are hidden
+            self._bind(slot, first_row + offset if offset < visible_rows else len(self._frames))
+
+        # Spacers stand in for the rows that aren't built, so the scrollbar covers the whole project
+        shown = min(visible_rows, max(0, len(self._frames) - first_row))
+        dpg.configure_item(self.top_spacer, height=first_row * self.row_height)
+        dpg.configure_item(self.bottom_spacer, height=max(0, len(self._frames) - first_row - shown) * self.row_height)
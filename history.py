@@ -0,0 +1,226 @@
+from collections import deque
+
+# Undo/redo history
+#
+# Actions only hold references (frame ids, manifest entries, node objects), never image data. Frame removals
+# park the image in the project trash, so undoing is a rename and the only cost of a deep history is the disk
+# used by the trash, which is what the budget limits.
+
+class HistoryAction:
+    label = ""
+
+    def undo(self):
+        pass
+
+    def redo(self):
+        pass
+
+    def disk_usage(self):
+        # bytes this action keeps alive in the project trash
+        return 0
+
+    def discard(self):
+        # called when the action falls out of the history for good
+        pass
+
+
+class HistoryManager:
+    def __init__(self, disk_budget=512 * 1024 * 1024):
+        self.disk_budget = disk_budget
+        self._undo_stack = deque()
+        self._redo_stack = []
+        self._busy = False
+
+    def can_undo(self):
+        return len(self._undo_stack) > 0
+
+    def can_redo(self):
+        return len(self._redo_stack) > 0
+
+    def is_busy(self):
+        # True while an undo/redo is being applied, so editors don't record their own replays
+        return self._busy
+
+    def push(self, action):
+        if self._busy:
+            return
+
+        for dropped in self._redo_stack:
+            dropped.discard()
+        self._redo_stack.clear()
+
+        self._undo_stack.append(action)
+        self._enforce_budget()
+
+    def undo(self):
+        if not self._undo_stack:
+            return None
+
+        action = self._undo_stack.pop()
+        self._busy = True
+        try:
+            action.undo()
+        finally:
+            self._busy = False
+        self._redo_stack.append(action)
+        self._enforce_budget()
+        return action
+
+    def redo(self):
+        if not self._redo_stack:
+            return None
+
+        action = self._redo_stack.pop()
+        self._busy = True
+        try:
+            action.redo()
+        finally:
+            self._busy = False
+        self._undo_stack.append(action)
+        self._enforce_budget()
+        return action
+
+    def disk_usage(self):
+        return sum(action.disk_usage() for action in self._undo_stack) + \
+            sum(action.disk_usage() for action in self._redo_stack)
+
+    def _enforce_budget(self):
+        # Drop the oldest actions (redo tail first, it is the least likely to be used) until the trash fits
+        usage = self.disk_usage()
+        while usage > self.disk_budget and (self._redo_stack or len(self._undo_stack) > 1):
+            if self._redo_stack:
+                dropped = self._redo_stack.pop(0)
+            else:
+                dropped = self._undo_stack.popleft()
+            usage -= dropped.disk_usage()
+            dropped.discard()
+
+    def clear(self):
+        for action in list(self._undo_stack) + self._redo_stack:
+            action.discard()
+        self._undo_stack.clear()
+        self._redo_stack.clear()
+
+
+# -------------- frame actions --------------
+
+class _FrameTrashAction(HistoryAction):
+    # Shared bookkeeping for actions whose frame may currently sit in the trash
+
+    def __init__(self, project, frame, index, trashed):
+        self.project = project
+        self.frame = frame
+        self.index = index
+        self.trashed = trashed
+
+    def _trash(self):
+        self.index, self.frame = self.project.trash_frame(self.frame["id"])
+        self.trashed = True
+
+    def _restore(self):
+        self.project.restore_frame(self.frame, self.index)
+        self.trashed = False
+
+    def disk_usage(self):
+        if not self.trashed:
+            return 0
+        return self.project.trash_size(self.frame)
+
+    def discard(self):
+        if self.trashed:
+            self.project.purge_trash(self.frame)
+
+
+class CaptureFrameAction(_FrameTrashAction):
+    label = "Capture"
+
+    def __init__(self, project, frame, index):
+        super().__init__(project, frame, index, trashed=False)
+
+    def undo(self):
+        self._trash()
+
+    def redo(self):
+        self._restore()
+
+
+class DeleteFrameAction(_FrameTrashAction):
+    label = "Delete Frame"
+
+    def __init__(self, project, frame, index):
+        super().__init__(project, frame, index, trashed=True)
+
+    def undo(self):
+        self._restore()
+
+    def redo(self):
+        self._trash()
+
+
+class MoveFrameAction(HistoryAction):
+    label = "Move Frame"
+
+    def __init__(self, project, frame_id, old_index, new_index):
+        self.project = project
+        self.frame_id = frame_id
+        self.old_index = old_index
+        self.new_index = new_index
+
+    def undo(self):
+        self.project.move_frame(self.frame_id, self.old_index)
+
+    def redo(self):
+        self.project.move_frame(self.frame_id, self.new_index)
+
+
+# -------------- node graph actions --------------
+
+class AddNodeAction(HistoryAction):
+    label = "Add Node"
+
+    def __init__(self, editor, node_tuple):
+        self.editor = editor
+        self.node_tuple = node_tuple
+
+    def undo(self):
+        self.editor.remove_node_items(self.node_tuple)
+
+    def redo(self):
+        self.editor.restore_node(self.node_tuple)
+
+
+class DeleteNodesAction(HistoryAction):
+    label = "Delete Nodes"
+
+    def __init__(self, editor, nodes, links):
+        # nodes: [(node_tuple, state)], links: [(output_attr, input_attr)]
+        self.editor = editor
+        self.nodes = nodes
+        self.links = links
+
+    def undo(self):
+        for node_tuple, state in self.nodes:
+            self.editor.restore_node(node_tuple, state)
+        for output_attr, input_attr in self.links:
+            self.editor.link(output_attr, input_attr)
+
+    def redo(self):
+        for output_attr, input_attr in self.links:
+            self.editor.unlink(output_attr, input_attr)
+        for node_tuple, _ in self.nodes:
+            self.editor.remove_node_items(node_tuple)
+
+
+class LinkAction(HistoryAction):
+    label = "Link"
+
+    def __init__(self, editor, output_attr, input_attr):
+        self.editor = editor
+        self.output_attr = output_attr
+        self.input_attr = input_attr
+
+    def undo(self):
+        self.editor.unlink(self.output_attr, self.input_attr)
+
+    def redo(self):
+        self.editor.link(self.output_attr, self.input_attr)
@@ -0,0 +1,149 @@
+import multiprocessing
+import os
+import uuid
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from threading import Thread, Event
+
+import cv2
+
+from conform import Conform
+from frames_panel import save_thumbnail
+
+IMAGE_EXTENSIONS = {".png", ".jpg", ".jpeg", ".bmp", ".tif", ".tiff", ".webp"}
+VIDEO_EXTENSIONS = {".mp4", ".mov", ".avi", ".mkv", ".webm", ".m4v"}
+
+# Worker side: each task decodes, conforms and writes its frames (png + thumbnail) and only returns file names,
+# so pixels never cross the process boundary and every worker holds a single frame at a time.
+
+def _write_frame(image, conform, frames_folder, thumbs_folder):
+    frame = conform.apply(image)
+    frame_id = uuid.uuid4().hex
+    cv2.imwrite(str(Path(frames_folder) / f"{frame_id}.png"), frame)
+    save_thumbnail(Path(thumbs_folder) / f"{frame_id}.jpg", frame)
+    return frame_id
+
+def _import_images(paths, conform_args, frames_folder, thumbs_folder):
+    conform = Conform(*conform_args)
+    written = []
+    for path in paths:
+        image = cv2.imread(path, cv2.IMREAD_COLOR)
+        if image is None:
+            continue
+        written.append((_write_frame(image, conform, frames_folder, thumbs_folder), Path(path).name))
+    return written
+
+def _import_video(path, start, count, conform_args, frames_folder, thumbs_folder):
+    conform = Conform(*conform_args)
+    capture = cv2.VideoCapture(path)
+    written = []
+    try:
+        capture.set(cv2.CAP_PROP_POS_FRAMES, start)
+        for index in range(start, start + count):
+            ok, image = capture.read()
+            if not ok:
+                break
+            written.append((_write_frame(image, conform, frames_folder, thumbs_folder), f"{Path(path).name}#{index}"))
+    finally:
+        capture.release()
+    return written
+
+def image_sequence(folder):
+    return sorted(str(path) for path in Path(folder).iterdir() if path.suffix.lower() in IMAGE_EXTENSIONS)
+
+class ImportJob:
+    """Imports an image folder or a video into the open project on a process pool.
+
+    Tasks are submitted in order with a bounded number in flight, and their frames are added to the manifest
+    in the same order as they complete, so memory stays flat however long the sequence is.
+    """
+
+    IMAGES_PER_TASK = 16
+    VIDEO_FRAMES_PER_TASK = 64
+
+    def __init__(self, project, conform, source, workers=None, on_progress=None, on_frames=None, on_done=None):
+        self.project = project
+        self.source = Path(source)
+        self.conform_args = (conform.width, conform.height, conform.mode, conform.interpolation)
+        self.workers = workers or max(1, (os.cpu_count() or 2) - 1)
+        self.on_progress = on_progress  # (done, total or None)
+        self.on_frames = on_frames  # (entries), called from the import thread for each completed task
+        self.on_done = on_done  # (imported, error)
+
+        self.total = None
+        self.imported = 0
+        self.cancelled = Event()
+        self._video_ended = False
+        self._thread = None
+
+    def start(self):
+        self._thread = Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def cancel(self, wait=False):
+        self.cancelled.set()
+        if wait and self._thread:
+            self._thread.join()
+
+    def is_running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def _tasks(self):
+        frames_folder, thumbs_folder = str(self.project.frames_folder), str(self.project.thumbs_folder)
+
+        if self.source.is_dir():
+            paths = image_sequence(self.source)
+            self.total = len(paths)
+            for start in range(0, len(paths), self.IMAGES_PER_TASK):
+                yield _import_images, (paths[start:start + self.IMAGES_PER_TASK], self.conform_args, frames_folder, thumbs_folder)
+            return
+
+        capture = cv2.VideoCapture(str(self.source))
+        frame_count = int(capture.get(cv2.CAP_PROP_FRAME_COUNT))
+        capture.release()
+        self.total = frame_count if frame_count > 0 else None
+
+        start = 0
+        # The container's frame count can be missing or wrong, stop when a chunk comes back short
+        while not self._video_ended and (self.total is None or start < self.total):
+            yield _import_video, (str(self.source), start, self.VIDEO_FRAMES_PER_TASK, self.conform_args, frames_folder, thumbs_folder)
+            start += self.VIDEO_FRAMES_PER_TASK
+
+    def _collect(self, future, expected):
+        written = future.result()
+        if len(written) < expected:
+            self._video_ended = True
+        if written and self.on_frames:
+            self.on_frames(written)
+        self.imported += len(written)
+        if self.on_progress:
+            self.on_progress(self.imported, self.total)
+
+    def _run(self):
+        self.project.frames_folder.mkdir(parents=True, exist_ok=True)
+        self.project.thumbs_folder.mkdir(parents=True, exist_ok=True)
+
+        error = None
+        try:
+            with ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+                pending = deque()
+                for function, args in self._tasks():
+                    if self.cancelled.is_set():
+                        break
+
+                    expected = len(args[0]) if function is _import_images else args[2]
+                    pending.append((pool.submit(function, *args), expected))
+                    if len(pending) >= self.workers * 2:
+                        self._collect(*pending.popleft())
+
+                while pending:
+                    future, expected = pending.popleft()
+                    if self.cancelled.is_set() and future.cancel():
+                        continue
+                    self._collect(future, expected)
+        except Exception as e:
+            error = e
+
+        if self.on_done:
+            self.on_done(self.imported, error)
@@ -1,17 +1,40 @@
 import array
+import queue
+import time
 import traceback
-from threading import Thread, Lock
+from concurrent.futures import Future
+from threading import Thread, Lock, Event
 import dearpygui.dearpygui as dpg
 import numpy as np
 
 from OpenSMA.effects_manager import EffectsManager
 from OpenSMA.manager import ConfigManager, ProjectManager
+from history import HistoryManager, CaptureFrameAction, DeleteFrameAction, MoveFrameAction
+from camera import CameraStream
+from motion import MotionDetector
+from scheduler import IntervalScheduler
+from bufferpool import frame_pool
+from conform import Conform
+from averaging import FrameAverager
+from importer import ImportJob, IMAGE_EXTENSIONS
+from playback import Playback
+from control import ControlServer
+from memory import MemoryBudget, StaticUsage
+from frames_panel import FramesPanel, save_thumbnail
 from ui import ui
 from pathlib import Path
 from cv2_enumerate_cameras import enumerate_cameras
 import cv2
 
 class App:
+    IDLE_AFTER = 1.0  # seconds without input before the UI drops to uiIdleFPS
+    # Config fields that are hot applied to the running cameras
+    CAMERA_SETTINGS = {
+        "cameraResolutionWidth": cv2.CAP_PROP_FRAME_WIDTH,
+        "cameraResolutionHeight": cv2.CAP_PROP_FRAME_HEIGHT,
+        "cameraFPS": cv2.CAP_PROP_FPS,
+    }
+
     def __init__(self):
         self.ui = ui(self)
         self.version = "1.0.0"
@@ -20,13 +43,62 @@ class App:
         self.camera_list = []
         self.isopenProject = False
         self.ProMan = None
-        self.cap = None
+        self.cameras = {}  # camera key (device index or URL) -> CameraStream
         self.isInitCap = False
         self.preview_size = (673, 380)
-        self.frame_lock = Lock()
+        # Preview conversion buffers, reused every tick (the float one is what the raw texture displays)
+        self.preview_bgr = np.empty((self.preview_size[1], self.preview_size[0], 3), np.uint8)
+        self.preview_rgb = np.empty_like(self.preview_bgr)
+        self.preview_texture = np.zeros(self.preview_size[0] * self.preview_size[1] * 3, np.float32)
+        self.pool_stats_time = 0.0
+        self.memory_budget = MemoryBudget(self.CM.memoryBudgetMB * 1024 * 1024)
+        self.memory_time = 0.0
+        self.conform = None  # fits captures and preview to the open project's resolution
+        self.frame_lock = Lock()  # guards current_frame/current_sources/current_timestamp, only ever held briefly
+        self.graph_lock = Lock()  # serializes node graph renders (live frames and captures)
         self.camera_thread = None
         self.running = False
         self.current_frame = None
+        self.current_sources = {}  # camera key -> synchronized raw frame used for current_frame
+        self.current_timestamp = None  # monotonic grab time of current_frame
+        self.frame_number = 0  # bumped for every rendered camera frame
+        self.frame_event = Event()  # wakes an idle main loop when a new frame is rendered
+        self.preview_key = None  # what the preview texture currently shows
+        self.layout_passes = 2  # ticks left to relayout, the capture window's height settles one frame later
+        self.last_input_time = 0.0
+        self.capture_lock = Lock()  # held while a capture is being written
+        self.import_job = None
+        self.playback = None
+        self.control_server = None
+        self.import_refresh_time = 0.0
+        self.frames_dirty = False  # the frames strip is rebuilt by the main loop, see refetch_frames_list
+        self.ui_calls = queue.Queue()  # (function, args, future) run by the main loop, see call_on_ui
+        self.history = HistoryManager()
+        self.auto_capture_enabled = False
+        self.motion_detector = MotionDetector()
+        self.interval_scheduler = IntervalScheduler(self.CM.intervalCaptureSeconds, self._interval_tick)
+
+        self.CM.subscribe(self.on_setting_changed)
+
+    def on_setting_changed(self, name, value):
+        if name == "memoryBudgetMB":
+            self.memory_budget.budget_bytes = value * 1024 * 1024
+        elif name == "historyDiskBudget":
+            self.history.disk_budget = value * 1024 * 1024
+        elif name == "intervalCaptureSeconds":
+            self.interval_scheduler.interval = value
+        elif name == "autoCaptureThreshold":
+            self.motion_detector.threshold = value
+        elif name == "autoCaptureStillTime":
+            self.motion_detector.still_time = value
+        elif name == "autoCaptureROI":
+            self.motion_detector.roi = tuple(value)
+        elif name in ("controlServerEnabled", "controlServerPort", "controlServerSocket"):
+            self.restart_control_server()
+        elif name in self.CAMERA_SETTINGS:
+            for stream in list(self.cameras.values()):
+                stream.configure(self.CAMERA_SETTINGS[name], value)
+        # cameraID/cameraURL changes are picked up by sync_cameras on the next processed frame
 
     def pre_new_project(self, _, __):
         dpg.show_item("new_project_window")
@@ -36,20 +108,7 @@ class App:
         dpg.hide_item("dialog_window_bclose")
         dpg.set_value("dialog_window_title", "Please wait...")
         dpg.set_value("dialog_window_text", "Starting camera...")
-        if self.CM.cameraID == -1:
-            self.cap = cv2.VideoCapture(self.CM.cameraURL)
-        else:
-            self.cap = cv2.VideoCapture(self.CM.cameraID)
-        dpg.set_value("dialog_window_text", "apply camera settings...")
-        self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, self.CM.cameraResolutionWidth)
-        self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, self.CM.cameraResolutionHeight)
-        self.cap.set(cv2.CAP_PROP_FPS, self.CM.cameraFPS)
-        #self.cap.set(cv2.CAP_PROP_BRIGHTNESS, self.CM.cameraBrightness)
-        #self.cap.set(cv2.CAP_PROP_CONTRAST, self.CM.cameraContrast)
-        #self.cap.set(cv2.CAP_PROP_SATURATION, self.CM.cameraSaturation)
-        #self.cap.set(cv2.CAP_PROP_HUE, self.CM.cameraHue)
-        #self.cap.set(cv2.CAP_PROP_GAIN, self.CM.cameraGain)
-        #self.cap.set(cv2.CAP_PROP_EXPOSURE, self.CM.cameraExposure)
+        self.sync_cameras()
 
         dpg.hide_item("dialog_window")
         self.isInitCap = True
@@ -57,6 +116,81 @@ class App:
         dpg.show_item("dialog_window_bclose")
         self.start_camera_thread()
 
+    def restart_control_server(self):
+        if self.control_server is not None:
+            self.control_server.stop()
+            self.control_server = None
+
+        if self.CM.controlServerEnabled:
+            control_server = ControlServer(self, port=self.CM.controlServerPort, unix_path=self.CM.controlServerSocket or None)
+            try:
+                control_server.start()
+            except OSError as e:
+                dpg.show_item("dialog_window")
+                dpg.set_value("dialog_window_title", "can't start control server")
+                dpg.set_value("dialog_window_text", str(e))
+                return
+            self.control_server = control_server
+
+    def call_on_ui(self, function, *args):
+        """Run function on the UI thread between frames, returns a concurrent.futures.Future of its result."""
+        future = Future()
+        self.ui_calls.put((function, args, future))
+        self.frame_event.set()
+        return future
+
+    def run_ui_calls(self):
+        while True:
+            try:
+                function, args, future = self.ui_calls.get_nowait()
+            except queue.Empty:
+                return
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                future.set_result(function(*args))
+            except Exception as e:
+                future.set_exception(e)
+
+    def publish(self, event, **data):
+        if self.control_server is not None:
+            self.control_server.publish(event, **data)
+
+    def set_auto_capture(self, _, enabled):
+        self.auto_capture_enabled = enabled
+        self.motion_detector.reset()
+
+    def toggle_interval_capture(self, _, __):
+        if self.interval_scheduler.is_running():
+            self.interval_scheduler.stop()
+            dpg.set_item_label("interval_capture_button", "Start")
+        else:
+            self.interval_scheduler.start()
+            dpg.set_item_label("interval_capture_button", "Stop")
+
+    def _interval_tick(self, tick, due):
+        # Without an open project and a running camera nothing would be written, so the tick counts as skipped
+        started = self.isopenProject and self.isInitCap and self.request_capture({"interval_tick": tick})
+        dpg.set_value("interval_capture_status", f"Captured: {self.interval_scheduler.fired + started}  Skipped: {self.interval_scheduler.skipped + (not started)}")
+        return started
+
+    def primary_camera_key(self):
+        return self.CM.cameraURL if self.CM.cameraID == -1 else self.CM.cameraID
+
+    def sync_cameras(self):
+        # One grab thread per camera in use: the configured camera plus any bound by a source node
+        wanted = {self.primary_camera_key()}
+        wanted.update(key for key in self.effects_manager.node_editor.source_cameras() if key is not None)
+
+        for key in wanted - self.cameras.keys():
+            stream = CameraStream(key, self.CM.cameraResolutionWidth, self.CM.cameraResolutionHeight, self.CM.cameraFPS)
+            stream.start()
+            self.cameras[key] = stream
+
+        for key in self.cameras.keys() - wanted:
+            # Don't wait for a read in progress, the grab thread releases the device when it exits
+            self.cameras.pop(key).stop(wait=False)
+
     def start_camera_thread(self):
         self.running = True
         self.camera_thread = Thread(target=self.camera_capture_loop, daemon=True)
@@ -68,66 +202,358 @@ class App:
             self.camera_thread.join()
 
     def camera_capture_loop(self):
-        while self.running:
-            ret, frame = self.cap.read()
-            if ret:
-                with self.frame_lock:
-                    output_frame = self.effects_manager.node_editor.render(frame.copy())
+        primary = None
+        frame_count = 0
 
-                    self.current_frame = output_frame
-        self.cap.release()
+        while self.running:
+            self.sync_cameras()
+
+            primary_key = self.primary_camera_key()
+            if self.cameras[primary_key] is not primary:
+                primary = self.cameras[primary_key]
+                frame_count = 0
+
+            # The configured camera paces the pipeline, the others are never waited on
+            frame_count, timestamp, frame = primary.wait_for_frame(frame_count)
+            if frame is None:
+                continue
+
+            # No defensive copy: camera frames are never written to, in-place nodes copy on first write
+            frames = {None: frame, primary_key: frame}
+            for key, stream in self.cameras.items():
+                if stream is not primary:
+                    _, other_frame = stream.nearest(timestamp)
+                    if other_frame is not None:
+                        frames[key] = other_frame
+
+            with self.graph_lock:
+                output_frame = self.effects_manager.node_editor.render(frames)
+
+            with self.frame_lock:
+                self.current_frame = output_frame
+                self.current_sources = frames
+                self.current_timestamp = timestamp
+                self.frame_number += 1
+            self.frame_event.set()
+
+            if self.auto_capture_enabled:
+                if self.motion_detector.update(frame, timestamp):
+                    self.request_capture()
+                dpg.set_value("auto_capture_status", f"Motion: {self.motion_detector.motion_level:.1f}%")
+
+        for stream in self.cameras.values():
+            stream.stop()
+        self.cameras.clear()
 
     def capture(self, _, __):
+        # Averaging and stills wait on the camera, keep that off the UI thread. A press while the previous
+        # capture is still being written is ignored
+        self.request_capture()
+
+    def request_capture(self, metadata=None):
+        """Capture on a helper thread, returns False (skipped) if the previous write hasn't finished."""
+        if not self.capture_lock.acquire(blocking=False):
+            return False
+
+        def worker():
+            try:
+                self.capture_frame(metadata)
+            finally:
+                self.capture_lock.release()
+
+        Thread(target=worker, daemon=True).start()
+        return True
+
+    def capture_frame(self, metadata=None):
         if not self.isInitCap:
             return
 
         if self.ProMan is None:
             return
 
-        frame = self.current_frame.copy() if self.current_frame is not None else None
+        timestamp, raw = self.average_frames() if self.CM.captureAverageFrames > 1 else (None, None)
+        if raw is None:
+            timestamp, raw = self.grab_still()
+
+        # Camera frames are never written to, a copy of the dict is a stable snapshot
+        with self.frame_lock:
+            frames = dict(self.current_sources)
+            if raw is None:
+                timestamp = self.current_timestamp
+        if raw is not None and frames:
+            # The averaged frame or the still replaces the primary source, in the render and in the saved angles
+            primary_key = self.primary_camera_key()
+            frames[None] = frames[primary_key] = raw
+
+        # Rendered again from the grabbed frames, as a capture pass: the live output may come from cache, and nodes
+        # keep the state (references, plates, tables) of the live resolution. Only the camera loop waits on this
+        # render, the preview keeps showing the last live frame
+        frame = None
+        if frames:
+            with self.graph_lock:
+                frame = self.effects_manager.node_editor.render(frames, capture=True)
+            frame = self.conform.apply(frame)
+        sources = {key: self.conform.apply(source) for key, source in frames.items() if key is not None}
 
         if frame is not None:
-            frame_file = self.ProMan.frames_folder / f"{len(list(self.ProMan.frames_folder.glob('*.png'))):06d}.png"
+            frame_id = self.ProMan.new_frame_id()
+            frame_file = self.ProMan.frames_folder / f"{frame_id}.png"
             cv2.imwrite(str(frame_file), frame)  # Fix: Convert Path to string
+            save_thumbnail(self.ProMan.thumbnail_path({"file": frame_file.name}), frame)
+
+            # Wall clock time the frame was grabbed, not when the write finished
+            metadata = dict(metadata or {})
+            if timestamp is not None:
+                metadata["captured"] = time.time() - (time.monotonic() - timestamp)
+
+            # With several cameras, also keep each angle of the synchronized set next to the rendered frame
+            if len(sources) > 1:
+                metadata["sources"] = {}
+                for i, (key, source) in enumerate(sources.items()):
+                    source_file = f"{frame_id}_cam{i}.png"
+                    cv2.imwrite(str(self.ProMan.frames_folder / source_file), source)
+                    metadata["sources"][str(key)] = source_file
+
+            frame_entry = self.ProMan.insert_frame(frame_id, **metadata)
+            self.history.push(CaptureFrameAction(self.ProMan, frame_entry, self.ProMan.index_of(frame_id)))
+            self.publish("captured", id=frame_id, index=self.ProMan.index_of(frame_id), file=frame_entry["file"])
 
             self.refetch_frames_list()
 
+    def grab_still(self):
+        """Full resolution still from the primary camera as (timestamp, frame), (None, None) when still mode is off
+        or unsupported."""
+        width, height = self.CM.captureStillWidth, self.CM.captureStillHeight
+        stream = self.cameras.get(self.primary_camera_key())
+        if stream is None or width <= 0 or height <= 0 or (width, height) == (stream.width, stream.height):
+            return None, None
+
+        dpg.set_value("still_status", f"Still: grabbing {width}x{height}...")
+        timestamp, still = stream.grab_still(width, height)
+        if still is None:
+            dpg.set_value("still_status", f"Still mode {width}x{height} not supported by the camera")
+        elif stream.still_latency is not None:
+            switch, restore = stream.still_latency
+            dpg.set_value("still_status", f"Still: {switch * 1000:.0f} ms to switch, {restore * 1000:.0f} ms back")
+        return timestamp, still
+
+    def average_frames(self):
+        """Average the next captureAverageFrames raw frames of the primary camera, before the effect graph.
+
+        Returns (timestamp, frame), the timestamp halfway between the first and last frame averaged, or (None, None)
+        if the camera stops delivering. Runs on the capture thread, waiting on the camera directly.
+        """
+        stream = self.cameras.get(self.primary_camera_key())
+        if stream is None:
+            return None, None
+
+        averager = FrameAverager(self.CM.captureAverageFrames, self.CM.captureAverageRejectOutliers)
+        # Generous timeout: a slow camera still has to deliver every frame
+        deadline = time.monotonic() + averager.count / max(self.CM.cameraFPS, 1) * 4 + 1
+        frame_count = stream.frame_count
+        first = last = None
+        while not averager.done.is_set() and stream.running and time.monotonic() < deadline:
+            frame_count, timestamp, frame = stream.wait_for_frame(frame_count)
+            if frame is not None:
+                averager.add(frame)
+                first = timestamp if first is None else first
+                last = timestamp
+
+        result = averager.result()
+        return ((first + last) / 2, result) if result is not None else (None, None)
+
+    def delete_frame(self, _, __, frame_id):
+        if not self.isopenProject:
+            return
+
+        index, frame_entry = self.ProMan.trash_frame(frame_id)
+        self.history.push(DeleteFrameAction(self.ProMan, frame_entry, index))
+        self.publish("deleted", id=frame_id, index=index)
+        self.refetch_frames_list()
+
+    def move_frame(self, _, __, user_data):
+        if not self.isopenProject:
+            return
+
+        frame_id, delta = user_data
+        old_index = self.ProMan.index_of(frame_id)
+        new_index = min(max(old_index + delta, 0), len(self.ProMan.frames) - 1)
+        if new_index == old_index:
+            return
+
+        self.ProMan.move_frame(frame_id, new_index)
+        self.history.push(MoveFrameAction(self.ProMan, frame_id, old_index, new_index))
+        self.refetch_frames_list()
+
+    def undo(self, _=None, __=None):
+        if self.history.undo() is not None:
+            self.refetch_frames_list()
+
+    def redo(self, _=None, __=None):
+        if self.history.redo() is not None:
+            self.refetch_frames_list()
+
+    def _shortcut_key(self, _, key):
+        if not dpg.is_key_down(dpg.mvKey_Control):
+            return
+
+        if key == dpg.mvKey_Z:
+            self.undo()
+        elif key == dpg.mvKey_Y:
+            self.redo()
+        elif key == dpg.mvKey_I:
+            self.pre_import()
+
+    def pre_import(self, _=None, __=None):
+        if not self.isopenProject or (self.import_job is not None and self.import_job.is_running()):
+            return
+        dpg.show_item("import_dialog")
+
+    def import_media(self, _, data):
+        # Picking an image imports the whole sequence in its folder, anything else is decoded as a video
+        source = Path(data["file_path_name"])
+        if source.suffix.lower() in IMAGE_EXTENSIONS:
+            source = source.parent
+
+        self.import_job = ImportJob(self.ProMan, self.conform, source, on_progress=self._import_progress,
+                                    on_frames=self._import_frames, on_done=self._import_done)
+        dpg.set_value("import_progress", 0.0)
+        dpg.configure_item("import_progress", overlay="Starting...")
+        dpg.show_item("import_window")
+        self.import_job.start()
+
+    def cancel_import(self, _=None, __=None):
+        if self.import_job is not None:
+            self.import_job.cancel()
+
+    def _import_frames(self, entries):
+        # Serialized with captures, the manifest is written in batches and the strip refreshed a few times a second
+        with self.capture_lock:
+            for frame_id, name in entries:
+                self.ProMan.insert_frame(frame_id, save=False, imported=name)
+
+            now = time.monotonic()
+            if now - self.import_refresh_time >= 1.0:
+                self.import_refresh_time = now
+                self.ProMan.save_manifest()
+                self.refetch_frames_list()
+
+    def _import_progress(self, done, total):
+        if total:
+            dpg.set_value("import_progress", done / total)
+            dpg.configure_item("import_progress", overlay=f"{done} / {total}")
+        else:
+            dpg.configure_item("import_progress", overlay=f"{done} frames")
+
+    def _import_done(self, imported, error):
+        with self.capture_lock:
+            self.ProMan.save_manifest()
+        self.refetch_frames_list()
+        dpg.hide_item("import_window")
+        self.publish("imported", count=imported, error=str(error) if error is not None else None)
+
+        if error is not None:
+            dpg.show_item("dialog_window")
+            dpg.set_value("dialog_window_title", "Import failed")
+            dpg.set_value("dialog_window_text", f"{imported} frames imported before the error:\n{error}")
+
+    def start_playback(self, start=0):
+        if not self.isopenProject or not self.ProMan.frames:
+            return False
+
+        self.stop_playback()
+        self.playback = Playback(self.ProMan, self.ProMan.project_fps, start=min(max(start, 0), len(self.ProMan.frames) - 1),
+                                 on_frame=self.frame_event.set)
+        self.playback.start()
+        return True
+
+    def stop_playback(self):
+        if self.playback is not None:
+            self.playback.stop()
+            self.playback = None
+
     def render_capture(self):
         if not (self.isInitCap and self.isopenProject):
             return
 
-        with self.frame_lock:
-            frame = self.current_frame.copy() if self.current_frame is not None else None
+        self.update_preview()
+
+        now = time.monotonic()
+        if now - self.pool_stats_time >= 1.0:
+            self.pool_stats_time = now
+            stats = frame_pool.stats()
+            dpg.set_value("pool_stats_text", f"Buffer pool: {stats['hit_rate'] * 100:.0f}% hits, {stats['pooled_bytes'] / 1048576:.0f} MB (peak {stats['peak_bytes'] / 1048576:.0f} MB)")
+
+    def update_preview(self):
+        # Only convert when there is something new to show
+        playback_index, playback_frame = self.playback.latest() if self.playback is not None and self.playback.is_playing() else (None, None)
+        if playback_frame is not None:
+            key = ("playback", playback_index)
+            if key == self.preview_key:
+                return
+            # Stored frames are already at project resolution, the conform only letterboxes them into the preview
+            self.conform.apply(playback_frame, out=self.preview_bgr)
+        else:
+            # Resize straight from the shared frame instead of copying it at full resolution first
+            with self.frame_lock:
+                key = ("live", self.frame_number)
+                if self.current_frame is None or key == self.preview_key:
+                    return
+                # Same crop/letterbox as the stored frames, straight to preview size in one pass
+                self.conform.apply(self.current_frame, out=self.preview_bgr)
+                self.effects_manager.node_editor.draw_preview(self.preview_bgr, self.conform)
+        self.preview_key = key
+
+        # Convert BGR to RGB for Dear PyGui and normalize to [0, 1], all into preallocated buffers
+        cv2.cvtColor(self.preview_bgr, cv2.COLOR_BGR2RGB, dst=self.preview_rgb)
+        np.multiply(self.preview_rgb.reshape(-1), 1 / 255.0, out=self.preview_texture)
+        dpg.set_value("texture_preview", self.preview_texture)
+
+    def update_memory(self):
+        # Once a second: evict across caches if over budget, then show where the memory goes
+        now = time.monotonic()
+        if now - self.memory_time < 1.0:
+            return
+        self.memory_time = now
 
-        if frame is not None:
-            display_frame = cv2.resize(frame, self.preview_size)
-            # Convert BGR to RGB for Dear PyGui
-            data = np.flip(display_frame, 2).ravel()  # Flatten the data
-            data = np.asfarray(data, dtype='f')  # Convert to 32-bit floats
-            texture_data = np.true_divide(data, 255.0)  # Normalize to [0, 1]
-            dpg.set_value("texture_preview", texture_data)
+        self.memory_budget.enforce()
+        usage = self.memory_budget.usage()
+        details = ", ".join(f"{name} {size / 1048576:.0f}" for name, size in usage.items())
+        dpg.set_value("memory_text", f"Memory: {sum(usage.values()) / 1048576:.0f} / {self.memory_budget.budget_bytes / 1048576:.0f} MB ({details})")
 
-    def refetch_frames_list(self):
-        if not self.isopenProject:
-            return
+    def on_viewport_resize(self, _=None, __=None):
+        self.layout_passes = 2
 
-        frames = self.ProMan.list_frames()
+    def on_input(self, _=None, __=None):
+        self.last_input_time = time.monotonic()
 
-        for frame in frames:
-            frame_name = frame.name
-            frame_path = frame
+    def wait_for_next_tick(self, tick_start):
+        """Cap the UI refresh rate, and when nothing is going on sleep until a new frame or the idle refresh."""
+        # With no cap set, vsync in render_dearpygui_frame already holds the loop to the display rate
+        if self.CM.uiMaxFPS > 0:
+            remaining = tick_start + 1.0 / self.CM.uiMaxFPS - time.monotonic()
+            if remaining > 0:
+                time.sleep(remaining)
 
-            with dpg.texture_registry():
-                width, height, channels, data = dpg.load_image(str(frame_path))
+        idle = not self.layout_passes and time.monotonic() - self.last_input_time > self.IDLE_AFTER
+        if idle:
+            self.frame_event.wait(max(0.0, tick_start + 1.0 / max(self.CM.uiIdleFPS, 1) - time.monotonic()))
+        self.frame_event.clear()
+
+    def refetch_frames_list(self):
+        # Safe from any thread: only marks the strip stale, the main loop rebuilds it between frames
+        self.frames_dirty = True
+        self.frame_event.set()
 
-                try:
-                    dpg.add_raw_texture(width, height, data, format=dpg.mvFormat_Float_rgb, tag=f"frame_texture_{frame_name}")
-                except Exception as e:
-                    continue
+    def update_frames_list(self):
+        if not self.frames_dirty:
+            return
+        self.frames_dirty = False
+        if not self.isopenProject:
+            return
 
-            with dpg.group(horizontal=True, parent="frames_window_group"):
-                dpg.add_image(f"frame_texture_{frame_name}")
-                dpg.add_button(label="Delete", callback=lambda _, __: frame_path.unlink(), tag=f"frame_delete_{frame_name}")
+        # Only rows in view are built, so this stays cheap however many frames the project has
+        self.frames_panel.set_frames(self.ProMan, self.ProMan.list_frames())
 
     def create_project(self, _, __):
         project_name = dpg.get_value("new_project_name")
@@ -136,17 +562,27 @@ class App:
         project_height = dpg.get_value("new_project_height")
         project_location = dpg.get_value("new_project_location")
 
+        if project_width < 1 or project_height < 1:
+            dpg.show_item("dialog_window")
+            dpg.set_value("dialog_window_title", "can't create project")
+            dpg.set_value("dialog_window_text", f"Resolution must be at least 1x1, got {project_width}x{project_height}")
+            return
+
         self.ProMan = ProjectManager(
             project_name,
             project_fps,
             project_width,
             project_height,
-            project_location
+            project_location,
+            conform_mode=dpg.get_value("new_project_conform_mode"),
+            conform_interpolation=dpg.get_value("new_project_conform_interpolation")
         )
 
         # Create the project
         try:
             self.ProMan.create_project()
+            self.open_conform()
+            self.history.clear()
             self.isopenProject = True
             self.refetch_frames_list()
             Thread(target=self.start_camera).start()
@@ -159,6 +595,9 @@ class App:
     def open_project(self, _, data):
         try:
             self.ProMan = ProjectManager.load_project(data["file_path_name"])
+            self.ProMan.empty_trash()  # leftovers from a session that didn't close cleanly
+            self.open_conform()
+            self.history.clear()
             self.isopenProject = True
             self.refetch_frames_list()
             Thread(target=self.start_camera).start()
@@ -167,23 +606,54 @@ class App:
             dpg.set_value("dialog_window_title", "can't create project")
             dpg.set_value("dialog_window_text", str(traceback.format_exc()))
 
+    def open_conform(self):
+        self.conform = Conform(self.ProMan.project_width, self.ProMan.project_height,
+                               self.ProMan.conform_mode, self.ProMan.conform_interpolation)
+        dpg.set_value("conform_mode", self.ProMan.conform_mode)
+        dpg.set_value("conform_interpolation", self.ProMan.conform_interpolation)
+
+    def set_conform(self, sender, value):
+        if not self.isopenProject:
+            return
+
+        if sender == "conform_mode":
+            self.ProMan.conform_mode = value
+        else:
+            self.ProMan.conform_interpolation = value
+        self.ProMan.save_settings()
+
+        with self.frame_lock:
+            self.conform.configure(self.ProMan.conform_mode, self.ProMan.conform_interpolation)
+        self.preview_key = None  # redraw the preview with the new fit even without a new frame
+
     def close_project(self, _, __):
         if not self.isopenProject:
             return
 
+        if self.interval_scheduler.is_running():
+            self.toggle_interval_capture(None, None)
+
+        if self.import_job is not None and self.import_job.is_running():
+            self.import_job.cancel(wait=True)
+
+        self.stop_playback()
+
         if self.isInitCap:
             self.stop_camera_thread()
 
         dpg.hide_item("capture_window")
 
+        self.history.clear()
+        self.ProMan.empty_trash()
+        self.frames_panel.set_frames(None, [])
         self.ProMan = None
-        self.cap = None
         self.isopenProject = False
         self.isInitCap = False
 
     def init(self):
         dpg.create_context()
         dpg.create_viewport(title='OpenSMA', width=1280, height=720, large_icon="icon.ico")  # set viewport window
+        dpg.set_viewport_vsync(True)  # paces the main loop at the display's refresh rate
         dpg.setup_dearpygui()
         dpg.show_viewport()
         dpg.render_dearpygui_frame()
@@ -211,6 +681,13 @@ class App:
             dpg.set_value("starting_status", "Creating config file")
             self.CM.save()
 
+        self.history.disk_budget = self.CM.historyDiskBudget * 1024 * 1024
+        self.motion_detector.threshold = self.CM.autoCaptureThreshold
+        self.motion_detector.still_time = self.CM.autoCaptureStillTime
+        self.motion_detector.roi = tuple(self.CM.autoCaptureROI)
+        self.interval_scheduler.interval = self.CM.intervalCaptureSeconds
+        self.restart_control_server()
+
         dpg.set_value("starting_status", "Scanning camera"); dpg.render_dearpygui_frame()
 
         for camera_info in enumerate_cameras(cv2.CAP_ANY):
@@ -235,6 +712,17 @@ class App:
 
         self.ui.menubar()
         self.ui.windows()
+        self.frames_panel = FramesPanel(self, "frames_window")
+
+        self.memory_budget.budget_bytes = self.CM.memoryBudgetMB * 1024 * 1024
+        self.memory_budget.register("Thumbnails", self.frames_panel)
+        self.memory_budget.register("Buffers", frame_pool)
+        self.memory_budget.register("Textures", StaticUsage(lambda: self.frames_panel.texture_bytes() + 2 * self.preview_texture.nbytes))
+
+        with dpg.handler_registry():
+            dpg.add_key_press_handler(dpg.mvKey_Z, callback=self._shortcut_key)
+            dpg.add_key_press_handler(dpg.mvKey_Y, callback=self._shortcut_key)
+            dpg.add_key_press_handler(dpg.mvKey_I, callback=self._shortcut_key)
 
         dpg.set_value("starting_status", "Init Effects GUI..."); dpg.render_dearpygui_frame()
 
@@ -244,14 +732,33 @@ class App:
         dpg.hide_item("splash_window")
         # -------------------------------------------
 
+        # Any input keeps the UI at full rate for a moment, otherwise it idles until a new frame arrives
+        dpg.set_viewport_resize_callback(self.on_viewport_resize)
+        with dpg.handler_registry():
+            dpg.add_mouse_move_handler(callback=self.on_input)
+            dpg.add_mouse_click_handler(callback=self.on_input)
+            dpg.add_mouse_wheel_handler(callback=self.on_input)
+            dpg.add_key_press_handler(callback=self.on_input)
+
         while dpg.is_dearpygui_running():
+            tick_start = time.monotonic()
             self.render()
             self.render_capture()
+            self.run_ui_calls()
+            self.update_frames_list()
+            self.frames_panel.update()
+            self.update_memory()
             dpg.render_dearpygui_frame()
+            self.wait_for_next_tick(tick_start)
 
         self.exit()
 
     def render(self):
+        # Window geometry only changes with the viewport
+        if not self.layout_passes:
+            return
+        self.layout_passes -= 1
+
         if dpg.is_viewport_resizable():
             viewport_width = dpg.get_viewport_client_width()
             viewport_height = dpg.get_viewport_client_height()
@@ -282,8 +789,13 @@ class App:
 
     def exit(self):
         self.close_project(None, None)
+        if self.control_server is not None:
+            self.control_server.stop()
+        self.CM.flush()
         dpg.destroy_context()
 
 
-app = App()
-app.init()
+# Guarded so worker processes (spawned by remote node execution) can import this module without starting the app
+if __name__ == "__main__":
+    app = App()
+    app.init()
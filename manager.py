@@ -1,10 +1,30 @@
 import json
 import os
+import time
+import uuid
 from pathlib import Path
+from threading import Lock, Timer
+
+def write_json_atomic(path, data):
+    # Write to a temp file next to the target and swap it in, so a crash never leaves a half written file
+    path = Path(path)
+    tmp_path = path.with_name(path.name + ".tmp")
+    with open(tmp_path, "w") as file:
+        json.dump(data, file, indent=4)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(tmp_path, path)
 
 class ConfigManager:
+    # Settings changed through set() are written after this many seconds of quiet
+    SAVE_DELAY = 0.5
+
     def __init__(self, config_path):
         self.config_path = config_path
+        self._listeners = []
+        self._save_lock = Lock()
+        self._write_lock = Lock()
+        self._save_timer = None
 
         self.cameraID = 0
         self.cameraURL = ""
@@ -25,8 +45,67 @@ class ConfigManager:
         self.exportBitrate = "2500k"
         self.exportFPS = 30
 
-    def save(self):
-        config = {
+        self.historyDiskBudget = 512  # MB kept in the project trash for undo
+
+        self.memoryBudgetMB = 1024  # thumbnails, frame buffers and textures together
+
+        self.intervalCaptureSeconds = 10.0
+
+        self.captureStillWidth = 0  # still resolution, 0 captures from the preview stream
+        self.captureStillHeight = 0
+
+        self.captureAverageFrames = 1  # frames averaged into each still, 1 disables averaging
+        self.captureAverageRejectOutliers = False
+
+        self.uiMaxFPS = 0  # UI refresh cap, 0 follows the display refresh rate (vsync)
+        self.uiIdleFPS = 10  # refresh rate when there is no input and no new camera frame
+
+        self.controlServerEnabled = False
+        self.controlServerPort = 47110  # localhost TCP port
+        self.controlServerSocket = ""  # Unix socket path, used instead of TCP when set
+
+        self.autoCaptureThreshold = 1.0  # percent of changed pixels counted as motion
+        self.autoCaptureStillTime = 1.0  # seconds
+        self.autoCaptureROI = [0.0, 0.0, 1.0, 1.0]  # normalized x, y, width, height
+
+    def subscribe(self, callback):
+        """Register callback(name, value), called whenever a setting changes through set()."""
+        self._listeners.append(callback)
+
+    def unsubscribe(self, callback):
+        if callback in self._listeners:
+            self._listeners.remove(callback)
+
+    def set(self, name, value):
+        if getattr(self, name) == value:
+            return
+
+        setattr(self, name, value)
+        for callback in list(self._listeners):
+            callback(name, value)
+
+        self.schedule_save()
+
+    def schedule_save(self):
+        # Coalesce bursts of changes (typing in an input) into one background write
+        with self._save_lock:
+            if self._save_timer is not None:
+                self._save_timer.cancel()
+            self._save_timer = Timer(self.SAVE_DELAY, self.save)
+            self._save_timer.daemon = True
+            self._save_timer.start()
+
+    def flush(self):
+        # Write any pending change now, used on exit
+        with self._save_lock:
+            pending = self._save_timer is not None
+            if pending:
+                self._save_timer.cancel()
+        if pending:
+            self.save()
+
+    def to_dict(self):
+        return {
             "camera": {
                 "camera_id": self.cameraID,
                 "camera_url": self.cameraURL,
@@ -49,10 +128,47 @@ class ConfigManager:
                 "codec": self.exportCodec,
                 "bitrate": self.exportBitrate,
                 "fps": self.exportFPS
+            },
+            "history": {
+                "disk_budget_mb": self.historyDiskBudget
+            },
+            "memory": {
+                "budget_mb": self.memoryBudgetMB
+            },
+            "interval_capture": {
+                "seconds": self.intervalCaptureSeconds
+            },
+            "capture_still": {
+                "width": self.captureStillWidth,
+                "height": self.captureStillHeight
+            },
+            "capture_averaging": {
+                "frames": self.captureAverageFrames,
+                "reject_outliers": self.captureAverageRejectOutliers
+            },
+            "ui": {
+                "max_fps": self.uiMaxFPS,
+                "idle_fps": self.uiIdleFPS
+            },
+            "control_server": {
+                "enabled": self.controlServerEnabled,
+                "port": self.controlServerPort,
+                "socket": self.controlServerSocket
+            },
+            "auto_capture": {
+                "threshold": self.autoCaptureThreshold,
+                "still_time": self.autoCaptureStillTime,
+                "roi": list(self.autoCaptureROI)
             }
         }
-        with open(self.config_path, 'w') as json_file:
-            json.dump(config, json_file, indent=4)
+
+    def save(self):
+        with self._save_lock:
+            self._save_timer = None
+            config = self.to_dict()
+
+        with self._write_lock:
+            write_json_atomic(self.config_path, config)
 
     def load(self):
         if not os.path.exists(self.config_path):
@@ -65,7 +181,8 @@ class ConfigManager:
         # Camera settings
         self.cameraID = config["camera"]["camera_id"]
         self.cameraURL = config["camera"]["camera_url"]
-        self.cameraResolution = (config["camera"]["resolution"]["width"], config["camera"]["resolution"]["height"])
+        self.cameraResolutionWidth = config["camera"]["resolution"]["width"]
+        self.cameraResolutionHeight = config["camera"]["resolution"]["height"]
         self.cameraFPS = config["camera"]["fps"]
         self.cameraBrightness = config["camera"]["brightness"]
         self.cameraContrast = config["camera"]["contrast"]
@@ -82,18 +199,69 @@ class ConfigManager:
         self.exportBitrate = config["export"]["bitrate"]
         self.exportFPS = config["export"]["fps"]
 
+        # History settings (missing in older config files)
+        self.historyDiskBudget = config.get("history", {}).get("disk_budget_mb", self.historyDiskBudget)
+
+        # Memory budget
+        self.memoryBudgetMB = config.get("memory", {}).get("budget_mb", self.memoryBudgetMB)
+
+        # Interval capture settings
+        self.intervalCaptureSeconds = config.get("interval_capture", {}).get("seconds", self.intervalCaptureSeconds)
+
+        # Still capture resolution
+        self.captureStillWidth = config.get("capture_still", {}).get("width", self.captureStillWidth)
+        self.captureStillHeight = config.get("capture_still", {}).get("height", self.captureStillHeight)
+
+        # Multi-frame averaging settings
+        capture_averaging = config.get("capture_averaging", {})
+        self.captureAverageFrames = capture_averaging.get("frames", self.captureAverageFrames)
+        self.captureAverageRejectOutliers = capture_averaging.get("reject_outliers", self.captureAverageRejectOutliers)
+
+        # UI refresh settings
+        self.uiMaxFPS = config.get("ui", {}).get("max_fps", self.uiMaxFPS)
+        self.uiIdleFPS = config.get("ui", {}).get("idle_fps", self.uiIdleFPS)
+
+        # Control server settings
+        control_server = config.get("control_server", {})
+        self.controlServerEnabled = control_server.get("enabled", self.controlServerEnabled)
+        self.controlServerPort = control_server.get("port", self.controlServerPort)
+        self.controlServerSocket = control_server.get("socket", self.controlServerSocket)
+
+        # Auto capture settings
+        auto_capture = config.get("auto_capture", {})
+        self.autoCaptureThreshold = auto_capture.get("threshold", self.autoCaptureThreshold)
+        self.autoCaptureStillTime = auto_capture.get("still_time", self.autoCaptureStillTime)
+        self.autoCaptureROI = auto_capture.get("roi", self.autoCaptureROI)
+
 class ProjectManager:
-    def __init__(self, project_name, project_fps, project_width, project_height, project_location):
+    def __init__(self, project_name, project_fps, project_width, project_height, project_location,
+                 conform_mode="Crop", conform_interpolation="Area"):
         self.project_name = project_name
         self.project_fps = project_fps
         self.project_width = project_width
         self.project_height = project_height
         self.project_location = project_location
 
+        # How captures are fitted to project_width x project_height (see conform.Conform)
+        self.conform_mode = conform_mode
+        self.conform_interpolation = conform_interpolation
+
         self.project_folder = Path(project_location)
         self.frames_folder = self.project_folder / "frames"  # Define the frames folder
+        self.manifest_file = self.project_folder / "frames.json"
+        self.journal_file = self.project_folder / "frames.journal"  # edits since frames.json was written
+        self.trash_folder = self.project_folder / ".trash"  # frames removed by undoable operations
+        self.thumbs_folder = self.project_folder / "thumbs"  # small JPEG per frame file for the frames panel
         self.current_frame = None
 
+        # Ordered frame entries; the manifest is the source of truth for frame order
+        self.frames = []
+        self._frames_by_id = {}
+        self._positions = {}  # frame id -> index in frames, None when an edit shifted entries
+        self._file_refs = {}  # file -> number of entries using it, duplicated frames share files
+        self._generation = 0  # bumped each time frames.json is written, journal lines carry it
+        self._journal_length = 0
+
     def create_project(self):
         # Check if project name is blank
         if not self.project_name.strip():
@@ -107,17 +275,21 @@ class ProjectManager:
         self.project_folder.mkdir(parents=True)
         self.frames_folder.mkdir(parents=True)
 
+        self.save_settings()
+        self.save_manifest()
+
+    def save_settings(self):
         # Save project settings to a JSON file
         project_settings = {
             "name": self.project_name,
             "fps": self.project_fps,
             "width": self.project_width,
             "height": self.project_height,
+            "conform_mode": self.conform_mode,
+            "conform_interpolation": self.conform_interpolation,
         }
 
-        settings_file = self.project_folder / "project.json"
-        with open(settings_file, "w") as file:
-            json.dump(project_settings, file)
+        write_json_atomic(self.project_folder / "project.json", project_settings)
 
     @staticmethod
     def load_project(project_location):
@@ -140,13 +312,235 @@ class ProjectManager:
                 raise KeyError(f"Missing required project setting: {field}")
 
         # Create and return a ProjectManager instance
-        return ProjectManager(
+        project = ProjectManager(
             project_name=project_settings["name"],
             project_fps=project_settings["fps"],
             project_width=project_settings["width"],
             project_height=project_settings["height"],
-            project_location=project_location
+            project_location=project_location,
+            conform_mode=project_settings.get("conform_mode", "Crop"),
+            conform_interpolation=project_settings.get("conform_interpolation", "Area")
         )
+        project.load_manifest()
+        return project
+
+    # -------------- frame manifest --------------
+    #
+    # frames.json holds the whole ordered list. Single edits are appended to frames.journal rather than rewriting
+    # it; the journal is replayed on load and folded back into frames.json every COMPACT_AFTER edits.
+
+    COMPACT_AFTER = 500
+
+    def save_manifest(self):
+        self._generation += 1
+        write_json_atomic(self.manifest_file, {"version": 1, "generation": self._generation, "frames": self.frames})
+        # A journal left behind by a crash right here has an older generation and is ignored on load
+        self.journal_file.unlink(missing_ok=True)
+        self._journal_length = 0
+
+    def _log(self, *operation):
+        with open(self.journal_file, "a") as file:
+            file.write(json.dumps([self._generation] + list(operation)) + "\n")
+            file.flush()
+            os.fsync(file.fileno())
+        self._journal_length += 1
+        if self._journal_length >= self.COMPACT_AFTER:
+            self.save_manifest()
+
+    def load_manifest(self):
+        if self.manifest_file.exists():
+            with open(self.manifest_file, "r") as file:
+                manifest = json.load(file)
+            frames = manifest["frames"]
+            self._generation = manifest.get("generation", 0)
+            compact = False
+        else:
+            # Older projects: frame order was implied by the zero-padded filenames
+            frames = [
+                {"id": frame_file.stem, "file": frame_file.name, "created": frame_file.stat().st_mtime}
+                for frame_file in sorted(self.frames_folder.glob("*.png"))
+            ]
+            compact = True
+
+        self.frames = []
+        self._frames_by_id = {}
+        self._positions = {}
+        self._file_refs = {}
+        for frame in frames:
+            self._insert(frame, None)
+
+        if self._replay_journal() or compact:
+            self.save_manifest()
+
+    def _replay_journal(self):
+        if not self.journal_file.exists():
+            return False
+
+        with open(self.journal_file, "r") as file:
+            for line in file:
+                try:
+                    generation, operation, *arguments = json.loads(line)
+                except ValueError:
+                    break  # torn last line, the edit never completed
+                if generation != self._generation:
+                    continue
+                if operation == "insert":
+                    self._insert(arguments[1], arguments[0])
+                elif operation == "remove":
+                    self._remove(arguments[0])
+                elif operation == "move":
+                    self._move(arguments[0], arguments[1])
+        return True
+
+    def _insert(self, frame, index):
+        if index is None or index >= len(self.frames):
+            self.frames.append(frame)
+            if self._positions is not None:
+                self._positions[frame["id"]] = len(self.frames) - 1
+        else:
+            self.frames.insert(index, frame)
+            self._positions = None
+        self._frames_by_id[frame["id"]] = frame
+
+        for file in self.frame_files(frame):
+            self._file_refs[file] = self._file_refs.get(file, 0) + 1
+
+    def _remove(self, frame_id):
+        index = self.index_of(frame_id)
+        frame = self._frames_by_id.pop(frame_id)
+        del self.frames[index]
+        if self._positions is not None:
+            del self._positions[frame_id]
+            if index != len(self.frames):
+                self._positions = None
+
+        for file in self.frame_files(frame):
+            self._file_refs[file] -= 1
+            if not self._file_refs[file]:
+                del self._file_refs[file]
+        return index, frame
+
+    def _move(self, frame_id, new_index):
+        _, frame = self._remove(frame_id)
+        self._insert(frame, new_index)
+
+    def new_frame_id(self):
+        return uuid.uuid4().hex
+
+    def frame_path(self, frame):
+        if isinstance(frame, str):
+            frame = self._frames_by_id[frame]
+        return self.frames_folder / frame["file"]
+
+    @staticmethod
+    def frame_files(frame):
+        # Main (rendered) image plus the per camera images of a synchronized multi-camera capture
+        return [frame["file"]] + list(frame.get("sources", {}).values())
+
+    def thumbnail_path(self, frame):
+        if isinstance(frame, str):
+            frame = self._frames_by_id[frame]
+        return self.thumbs_folder / (Path(frame["file"]).stem + ".jpg")
+
+    def _unlink_thumbnail(self, file):
+        (self.thumbs_folder / (Path(file).stem + ".jpg")).unlink(missing_ok=True)
+
+    def get_frame(self, frame_id):
+        return self._frames_by_id[frame_id]
+
+    def index_of(self, frame_id):
+        # Rebuilt after an edit in the middle, appends (captures) keep it current
+        if self._positions is None:
+            self._positions = {frame["id"]: index for index, frame in enumerate(self.frames)}
+        return self._positions[frame_id]
 
     def list_frames(self):
-        return sorted(self.frames_folder.glob("*.png"))
\ No newline at end of file
+        return list(self.frames)
+
+    def insert_frame(self, frame_id, index=None, file=None, save=True, **metadata):
+        """Register an already written frame file in the manifest, appending when index is None."""
+        if frame_id in self._frames_by_id:
+            raise KeyError(f"Frame {frame_id} already exists")
+
+        frame = {"id": frame_id, "file": file or f"{frame_id}.png", "created": time.time()}
+        frame.update(metadata)
+
+        self._insert(frame, index)
+        if save:
+            self._log("insert", index, frame)
+        return frame
+
+    def remove_frame(self, frame_id, save=True):
+        """Drop a frame from the manifest without touching its file, returns (index, entry)."""
+        index, frame = self._remove(frame_id)
+        if save:
+            self._log("remove", frame_id)
+        return index, frame
+
+    def restore_frame(self, frame, index, save=True):
+        """Put a previously removed manifest entry back, recovering its file from the trash if needed."""
+        for file in self.frame_files(frame):
+            trashed_file = self.trash_folder / file
+            if trashed_file.exists():
+                os.replace(trashed_file, self.frames_folder / file)
+
+        self._insert(frame, index)
+        if save:
+            self._log("insert", index, frame)
+
+    def trash_frame(self, frame_id):
+        """Remove a frame from the manifest and park its file in the project trash (a rename, not a copy)."""
+        index, frame = self.remove_frame(frame_id)
+
+        for file in self.frame_files(frame):
+            if not self.is_file_referenced(file) and (self.frames_folder / file).exists():
+                self.trash_folder.mkdir(exist_ok=True)
+                os.replace(self.frames_folder / file, self.trash_folder / file)
+        return index, frame
+
+    def trash_size(self, frame):
+        size = 0
+        for file in self.frame_files(frame):
+            trashed_file = self.trash_folder / file
+            if trashed_file.exists():
+                size += trashed_file.stat().st_size
+        return size
+
+    def purge_trash(self, frame):
+        for file in self.frame_files(frame):
+            if not self.is_file_referenced(file):
+                (self.trash_folder / file).unlink(missing_ok=True)
+                self._unlink_thumbnail(file)
+
+    def empty_trash(self):
+        if not self.trash_folder.exists():
+            return
+
+        for trashed_file in self.trash_folder.iterdir():
+            trashed_file.unlink(missing_ok=True)
+            self._unlink_thumbnail(trashed_file.name)
+
+    def is_file_referenced(self, file):
+        return file in self._file_refs
+
+    def delete_frame(self, frame_id):
+        index, frame = self.remove_frame(frame_id)
+
+        # Duplicated frames share files, only unlink once nothing points at them
+        for file in self.frame_files(frame):
+            if not self.is_file_referenced(file):
+                (self.frames_folder / file).unlink(missing_ok=True)
+                self._unlink_thumbnail(file)
+        return index, frame
+
+    def move_frame(self, frame_id, new_index):
+        self._move(frame_id, new_index)
+        self._log("move", frame_id, new_index)
+
+    def duplicate_frame(self, frame_id, index=None):
+        source = self._frames_by_id[frame_id]
+        if index is None:
+            index = self.index_of(frame_id) + 1
+
+        metadata = {key: value for key, value in source.items() if key not in ("id", "file", "created")}
+        return self.insert_frame(self.new_frame_id(), index=index, file=source["file"], **metadata)
\ No newline at end of file
@@ -0,0 +1,48 @@
+class StaticUsage:
+    # Memory that is counted against the budget but can't be evicted, e.g. textures on screen
+    def __init__(self, usage):
+        self.usage = usage
+
+    def memory_usage(self):
+        return self.usage()
+
+class MemoryBudget:
+    """One memory budget shared by every cache in the app.
+
+    Consumers provide memory_usage() and, when they can give memory back, oldest_access() (monotonic time of
+    their least recently used entry, None when nothing is evictable) and evict_oldest() (bytes freed). When the
+    total is over budget the globally least recently used entry is evicted first, whichever cache holds it.
+    """
+
+    def __init__(self, budget_bytes):
+        self.budget_bytes = budget_bytes
+        self._consumers = {}  # name -> consumer
+
+    def register(self, name, consumer):
+        self._consumers[name] = consumer
+
+    def unregister(self, name):
+        self._consumers.pop(name, None)
+
+    def usage(self):
+        return {name: consumer.memory_usage() for name, consumer in self._consumers.items()}
+
+    def enforce(self):
+        """Evict until the total fits the budget, returns the bytes freed."""
+        total = sum(self.usage().values())
+        freed = 0
+        while total > self.budget_bytes:
+            candidates = []
+            for consumer in self._consumers.values():
+                oldest = consumer.oldest_access() if hasattr(consumer, "evict_oldest") else None
+                if oldest is not None:
+                    candidates.append((oldest, consumer))
+            if not candidates:
+                break
+
+            evicted = min(candidates, key=lambda candidate: candidate[0])[1].evict_oldest()
+            if not evicted:
+                break
+            total -= evicted
+            freed += evicted
+        return freed
@@ -1,6 +1,16 @@
+import itertools
 import dearpygui.dearpygui as dpg
 import numpy as np
 
+from history import AddNodeAction, DeleteNodesAction, LinkAction
+from bufferpool import frame_pool
+
+# Data versions are globally unique, so a version seen on an input always means the same data
+_versions = itertools.count(1)
+
+def new_version():
+    return next(_versions)
+
 # Node type definitions remain the same
 class NodeType:
     SourceNode = 0
@@ -12,10 +22,14 @@ class OutputNodeAttribute:
         self._label = label
         self.uuid = dpg.generate_uuid()
         self._children = []  # output attributes
+        self._links = {}  # child -> dpg link item
         self._data = None
+        self._version = None
+        self._node = None  # node owning this attribute, set by Node.add_output_attribute
+        self._stealable = False  # a single consumer may write into _data instead of copying it
 
     def add_child(self, parent, child):
-        dpg.add_node_link(self.uuid, child.uuid, parent=parent)
+        self._links[child] = dpg.add_node_link(self.uuid, child.uuid, parent=parent)
         child.set_parent(self)
         self._children.append(child)
 
@@ -24,11 +38,26 @@ class OutputNodeAttribute:
             self._children.remove(child)
             child.set_parent(None)
             child._data = None
+            child._version = None
 
-    def execute(self, data):
+        link = self._links.pop(child, None)
+        if link is not None and dpg.does_item_exist(link):
+            dpg.delete_item(link)
+
+    def execute(self, data, version=None):
+        # Passing the version of already emitted data tells downstream nodes nothing changed
         self._data = data
+        self._version = new_version() if version is None else version
+        self._stealable = False  # only Node.run knows whether the buffer is the node's own
         for child in self._children:
             child._data = self._data
+            child._version = self._version
+
+    def release(self):
+        # An in-place consumer took the buffer, the owning node can no longer re-emit it from cache
+        self._stealable = False
+        if self._node is not None:
+            self._node._cache_valid = False
 
     def clear_connections(self):
         for child in self._children[:]:  # Create a copy of the list to avoid modification during iteration
@@ -48,10 +77,28 @@ class InputNodeAttribute:
         self.uuid = dpg.generate_uuid()
         self._parent = None
         self._data = None
+        self._version = None
+        self._taken = False  # data was handed over for in-place use during this run
 
     def get_data(self):
         return self._data
 
+    def get_writable_data(self):
+        """Buffer the caller may modify: the upstream one when this input is its only consumer, a copy otherwise."""
+        data = self._data
+        if data is None:
+            return None
+
+        parent = self._parent
+        if parent is not None and parent._stealable and len(parent._children) == 1 and parent._data is data:
+            parent.release()
+            self._taken = True
+            return data
+        return frame_pool.copy(data)
+
+    def get_version(self):
+        return self._version
+
     def set_parent(self, parent: OutputNodeAttribute):
         self._parent = parent
 
@@ -60,6 +107,7 @@ class InputNodeAttribute:
             self._parent.remove_child(self)
         self._parent = None
         self._data = None
+        self._version = None
 
     def submit(self, parent):
         with dpg.node_attribute(parent=parent, user_data=self, id=self.uuid):
@@ -67,6 +115,14 @@ class InputNodeAttribute:
 
 
 class Node:
+    # Nodes whose output depends only on their inputs and parameters can be skipped when neither changed
+    cacheable = True
+    # Nodes that write their result into the input buffer (see input_buffer)
+    inplace = False
+    # Set while the graph renders a frame to be saved (NodeEditor.render(capture=True)): nodes must not update
+    # persistent state (references, plates, size-keyed tables) and must not draw preview-only overlays
+    capture_pass = False
+
     def __init__(self, label: str, data):
         self.label = label
         self.uuid = dpg.generate_uuid()
@@ -75,6 +131,11 @@ class Node:
         self._output_attributes = []
         self._data = data
 
+        self._parameter_version = 0
+        self._cache_key = None
+        self._cache_valid = False
+        self._cached_outputs = []  # (data, version, stealable) per output attribute
+
     def clear_all_connections(self):
         # Clear all input connections
         for input_attr in self._input_attributes:
@@ -91,8 +152,15 @@ class Node:
         self._input_attributes.append(attribute)
 
     def add_output_attribute(self, attribute: OutputNodeAttribute):
+        attribute._node = self
         self._output_attributes.append(attribute)
 
+    def input_buffer(self, index):
+        # In-place nodes get a buffer they own (copy-on-write on fan-out), others a read only reference
+        if self.inplace:
+            return self._input_attributes[index].get_writable_data()
+        return self._input_attributes[index].get_data()
+
     def execute(self, frame):
         for attribute in self._output_attributes:
             attribute.execute(self._data)
@@ -102,6 +170,77 @@ class Node:
     def custom(self):
         pass
 
+    def close(self):
+        # Called when the node is removed from the editor, release threads/processes here
+        pass
+
+    def draw_preview(self, preview, conform):
+        # Preview-only overlay (e.g. focus peaking) drawn on the conformed live output, never part of a capture
+        pass
+
+    def invalidate(self):
+        # For internal state not visible in the widgets (e.g. a captured reference)
+        self._parameter_version += 1
+
+    def parameter_key(self):
+        return self._parameter_version, list(self.get_state().values())
+
+    def run(self):
+        """Execute the node, or re-emit the cached outputs when input versions and parameters are unchanged."""
+        for attribute in self._input_attributes:
+            attribute._taken = False
+
+        # Captures always compute, they never read or replace the live cache
+        cacheable = self.cacheable and not self.capture_pass
+
+        key = None
+        if cacheable:
+            key = ([attribute.get_version() for attribute in self._input_attributes], self.parameter_key())
+            if key == self._cache_key and self._cache_valid:
+                for attribute, (data, version, stealable) in zip(self._output_attributes, self._cached_outputs):
+                    attribute.execute(data, version)
+                    attribute._stealable = stealable
+                return
+
+        self.execute(None)
+
+        # Outputs that are not a borrowed input (pass-through) belong to this node and may be handed to a single
+        # in-place consumer
+        borrowed = [id(attribute._data) for attribute in self._input_attributes
+                    if attribute._data is not None and not attribute._taken]
+        for attribute in self._output_attributes:
+            attribute._stealable = attribute._data is not None and id(attribute._data) not in borrowed
+
+        if not cacheable:
+            return
+
+        if key == self._cache_key:
+            # Recomputed only because a consumer took the cached buffer: same inputs, so keep the old versions
+            for attribute, (_, version, _) in zip(self._output_attributes, self._cached_outputs):
+                stealable = attribute._stealable
+                attribute.execute(attribute._data, version)
+                attribute._stealable = stealable
+
+        self._cache_key = key
+        self._cache_valid = True
+        self._cached_outputs = [(attribute._data, attribute._version, attribute._stealable)
+                                for attribute in self._output_attributes]
+
+    def get_state(self):
+        # Values of the widgets created in custom(), keyed by their tag
+        state = {}
+        for item in dpg.get_item_children(self.static_uuid, slot=1) or []:
+            try:
+                state[item] = dpg.get_value(item)
+            except Exception:
+                continue
+        return state
+
+    def set_state(self, state):
+        for item, value in state.items():
+            if dpg.does_item_exist(item):
+                dpg.set_value(item, value)
+
     def submit(self, parent):
         with dpg.node(parent=parent, label=self.label, tag=self.uuid):
             for attribute in self._input_attributes:
@@ -115,24 +254,123 @@ class Node:
                 attribute.submit(self.uuid)
 
 
+class FrameNode(Node):
+    """Frame in, frame out node whose work is the pure function process_frame(frame, params).
+
+    Because process_frame doesn't touch DPG it can be moved to worker processes (see remote.py), which keeps
+    GIL-bound effects from stalling the capture thread and isolates crashes. Set stripe_safe when the function
+    works on horizontal stripes independently, so several workers can share a frame. In-place subclasses get a
+    frame they own and may write the result into it.
+    """
+
+    stripe_safe = False
+
+    @staticmethod
+    def process_frame(frame, params):
+        return frame
+
+    def __init__(self, name, data):
+        super().__init__(name, data)
+
+        self.add_input_attribute(InputNodeAttribute("Frame"))
+        self.add_output_attribute(OutputNodeAttribute("Frame"))
+
+        self.worker_in = dpg.generate_uuid()
+        self.workers_in = dpg.generate_uuid()
+        self.worker_status = dpg.generate_uuid()
+        self._executor = None
+
+    def frame_parameters(self):
+        # Picklable parameters handed to process_frame, read from the widgets on the UI side
+        return {}
+
+    def custom_parameters(self):
+        pass
+
+    def custom(self):
+        self.custom_parameters()
+        dpg.add_checkbox(label="Run in Worker Process", tag=self.worker_in, callback=self._set_worker_mode)
+        if self.stripe_safe:
+            dpg.add_input_int(label="Workers", tag=self.workers_in, default_value=1, min_value=1, max_value=16, min_clamped=True, max_clamped=True, width=150, callback=self._set_worker_mode)
+        dpg.add_text("", tag=self.worker_status)
+
+    def _set_worker_mode(self, *_):
+        if self._executor is not None:
+            self._executor.close()
+            self._executor = None
+
+        if dpg.get_value(self.worker_in):
+            from remote import RemoteNodeExecutor
+            workers = dpg.get_value(self.workers_in) if self.stripe_safe else 1
+            self._executor = RemoteNodeExecutor(type(self), workers)
+        else:
+            dpg.set_value(self.worker_status, "")
+        self.invalidate()
+
+    def set_state(self, state):
+        # Undo/redo restores the checkbox without its callback, bring the workers in line with it
+        super().set_state(state)
+        if (self._executor is not None) != bool(dpg.get_value(self.worker_in)):
+            self._set_worker_mode()
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.close()
+            self._executor = None
+        if dpg.does_item_exist(self.worker_in):
+            dpg.set_value(self.worker_in, False)
+
+    def execute(self, _):
+        executor = self._executor
+        # Frames sent to a worker are copied into shared memory, so only the local path needs its own buffer
+        frame = self.input_buffer(0) if executor is None else self._input_attributes[0].get_data()
+        if frame is None:
+            self._output_attributes[0].execute(None)
+            return
+
+        params = self.frame_parameters()
+        if executor is None:
+            output_frame = self.process_frame(frame, params)
+        else:
+            from remote import WorkerError, WorkerStarting
+            try:
+                output_frame = executor.process(frame, params)
+                dpg.set_value(self.worker_status, f"Running in worker process {', '.join(map(str, executor.pids()))}")
+            except WorkerStarting:
+                dpg.set_value(self.worker_status, "Starting worker...")
+                output_frame = frame
+                self.invalidate()
+            except WorkerError as e:
+                # Keep the pipeline alive: pass the frame through until the worker is back
+                dpg.set_value(self.worker_status, f"Worker failed: {str(e).strip().splitlines()[-1]}")
+                output_frame = frame
+                self.invalidate()  # don't let the cache keep serving the pass-through
+
+        self._output_attributes[0].execute(output_frame)
+
+
 class NodeEditor:
     @staticmethod
     def _link_callback(sender, app_data, user_data):
         output_attr_uuid, input_attr_uuid = app_data
         input_attr = dpg.get_item_user_data(input_attr_uuid)
         output_attr = dpg.get_item_user_data(output_attr_uuid)
-        output_attr.add_child(sender, input_attr)
+        user_data.link(output_attr, input_attr)
+
+        if user_data.history:
+            user_data.history.push(LinkAction(user_data, output_attr, input_attr))
 
-    def __init__(self):
+    def __init__(self, history=None):
         self._nodes = []
         self.uuid = dpg.generate_uuid()
+        self.history = history
 
     def _count_node_type(self, node_type):
         return sum(1 for node in self._nodes if node[1] == node_type)
 
     def can_add_node_type(self, node_type):
         if node_type == NodeType.SourceNode:
-            return self._count_node_type(NodeType.SourceNode) == 0
+            return True  # one source per camera
         elif node_type == NodeType.SinkNode:
             return self._count_node_type(NodeType.SinkNode) == 0
         else:  # ProcessNode
@@ -154,9 +392,51 @@ class NodeEditor:
             node[0].clear_all_connections()
             self._nodes.remove(node)
 
+    def link(self, output_attr, input_attr):
+        output_attr.add_child(self.uuid, input_attr)
+
+    def unlink(self, output_attr, input_attr):
+        output_attr.remove_child(input_attr)
+
+    def remove_node_items(self, node_tuple):
+        node = node_tuple[0]
+        node.close()
+
+        # Clear all connections
+        node.clear_all_connections()
+
+        # Delete all attributes visually
+        for attr in node._input_attributes + node._output_attributes:
+            dpg.delete_item(attr.uuid)
+
+        # Delete the static attribute
+        dpg.delete_item(node.static_uuid)
+
+        # Delete the node visually
+        dpg.delete_item(node.uuid)
+
+        # Remove from internal list
+        if node_tuple in self._nodes:
+            self._nodes.remove(node_tuple)
+
+    def restore_node(self, node_tuple, state=None):
+        node_tuple[0].submit(self.uuid)
+        self._nodes.append(node_tuple)
+
+        if state:
+            node_tuple[0].set_state(state)
+
     def on_drop(self, sender, app_data, user_data):
         source, generator, data = app_data
-        node_tuple = generator(source.label, data)
+        try:
+            node_tuple = generator(source.label, data)
+        except Exception as e:
+            # Plugin modules are imported here, on first use
+            with dpg.window(label="Error", modal=True, show=True, width=300, height=100):
+                dpg.add_text(f"Can't load {source.label}: {e}")
+                dpg.add_button(label="OK", width=75,
+                               callback=lambda: dpg.delete_item(dpg.get_item_parent(dpg.last_item())))
+            return
 
         # Check if we can add this type of node
         if not self.can_add_node_type(node_tuple[1]):
@@ -169,7 +449,8 @@ class NodeEditor:
             return
 
         node_tuple[0].submit(self.uuid)
-        self.add_node(node_tuple)
+        if self.add_node(node_tuple) and self.history:
+            self.history.push(AddNodeAction(self, node_tuple))
 
     def _delete_selected(self, sender, app_data):
         selected_nodes = dpg.get_selected_nodes(self.uuid)
@@ -197,6 +478,7 @@ class NodeEditor:
                 print(e)
 
         # Delete all identified links
+        deleted_links = []
         for link in links_to_delete:
             try:
                 # Get the nodes connected by this link
@@ -210,15 +492,18 @@ class NodeEditor:
 
                 # Clear the connection
                 if input_attr and output_attr:
-                    output_attr.remove_child(input_attr)
+                    self.unlink(output_attr, input_attr)
+                    deleted_links.append((output_attr, input_attr))
 
                 # Delete the link visually
-                dpg.delete_item(link)
+                if dpg.does_item_exist(link):
+                    dpg.delete_item(link)
             except SystemError:
                 # Handle case where link might have been already deleted
                 continue
 
         # Then handle the nodes
+        deleted_nodes = []
         for node_id in selected_nodes:
             # Find the corresponding node in our internal list
             node_to_delete = None
@@ -228,21 +513,11 @@ class NodeEditor:
                     break
 
             if node_to_delete:
-                # Clear all connections
-                node_to_delete[0].clear_all_connections()
-
-                # Delete all attributes visually
-                for attr in node_to_delete[0]._input_attributes + node_to_delete[0]._output_attributes:
-                    dpg.delete_item(attr.uuid)
-
-                # Delete the static attribute
-                dpg.delete_item(node_to_delete[0].static_uuid)
-
-                # Delete the node visually
-                dpg.delete_item(node_id)
+                deleted_nodes.append((node_to_delete, node_to_delete[0].get_state()))
+                self.remove_node_items(node_to_delete)
 
-                # Remove from internal list
-                self._nodes.remove(node_to_delete)
+        if self.history and (deleted_nodes or deleted_links):
+            self.history.push(DeleteNodesAction(self, deleted_nodes, deleted_links))
 
     def submit(self, parent):
         with dpg.handler_registry():
@@ -250,36 +525,91 @@ class NodeEditor:
 
         with dpg.child_window(width=-160, parent=parent, user_data=self,
                               drop_callback=lambda s, a, u: dpg.get_item_user_data(s).on_drop(s, a, u)):
-            with dpg.node_editor(tag=self.uuid, callback=NodeEditor._link_callback, width=-1, height=-1):
+            with dpg.node_editor(tag=self.uuid, callback=NodeEditor._link_callback, user_data=self, width=-1, height=-1):
                 for node in self._nodes:
                     node.submit(self.uuid)
 
-    def render(self, frame):
-        for source_node in [node for node in self._nodes if node[1] == NodeType.SourceNode]:
-            source_node[0].execute(frame)
-
-        for process_node in [node for node in self._nodes if node[1] == NodeType.ProcessNode]:
-            process_node[0].execute(None)
-
-        sink_nodes = [node for node in self._nodes if node[1] == NodeType.SinkNode]
-        if sink_nodes:
-            final_frame = sink_nodes[0][0].execute(None)
-        else:
-            final_frame = np.zeros((100, 100, 3), np.uint8)
+    def source_cameras(self):
+        return [node[0].camera_key for node in self._nodes if node[1] == NodeType.SourceNode]
+
+    def _execution_order(self):
+        # Process nodes sorted so every node runs after the nodes feeding its inputs
+        owners = {}
+        for node, _ in self._nodes:
+            for attribute in node._output_attributes:
+                owners[attribute] = node
+
+        process_nodes = [node for node, node_type in self._nodes if node_type == NodeType.ProcessNode]
+        ordered = []
+        visited = set()
+
+        def visit(node):
+            if node in visited:
+                return
+            visited.add(node)
+            for attribute in node._input_attributes:
+                upstream = owners.get(attribute._parent)
+                if upstream is not None:
+                    visit(upstream)
+            if node in process_nodes:
+                ordered.append(node)
+
+        for node in process_nodes:
+            visit(node)
+        return ordered
+
+    def render(self, frames, capture=False):
+        # frames: camera key -> frame, the None key being the configured camera. capture renders a frame to be
+        # saved: every node computes from the given frames and keeps its live state untouched
+        for node, _ in self._nodes:
+            node.capture_pass = capture
+
+        try:
+            for source_node in [node for node in self._nodes if node[1] == NodeType.SourceNode]:
+                source_node[0].process(frames.get(source_node[0].camera_key))
+
+            for process_node in self._execution_order():
+                process_node.run()
+
+            sink_nodes = [node for node in self._nodes if node[1] == NodeType.SinkNode]
+            if sink_nodes:
+                final_frame = sink_nodes[0][0].execute(None)
+            else:
+                final_frame = np.zeros((100, 100, 3), np.uint8)
+        finally:
+            if capture:
+                for node, _ in self._nodes:
+                    node.capture_pass = False
 
         return final_frame
 
+    def draw_preview(self, preview, conform):
+        # preview is the last rendered frame after conform, overlays are drawn in place
+        for node, _ in self._nodes:
+            node.draw_preview(preview, conform)
+
 class DragSource:
-    def __init__(self, label: str, node_generator, data):
+    def __init__(self, label: str, node_generator, data, parameters=None):
         self.label = label
         self._generator = node_generator
         self._data = data
+        self._parameters = parameters or []  # [{"name", "type", "default"}] shown without loading the node
 
     def submit(self, parent):
         dpg.add_button(label=self.label, parent=parent, width=-1)
 
         with dpg.drag_payload(parent=dpg.last_item(), drag_data=(self, self._generator, self._data)):
             dpg.add_text(f"Name: {self.label}")
+            for parameter in self._parameters:
+                dpg.add_text(f"{parameter['name']}: {parameter.get('default', '')}")
+
+
+class DragSourceHeader:
+    def __init__(self, label: str):
+        self.label = label
+
+    def submit(self, parent):
+        dpg.add_text(self.label, parent=parent)
 
 
 class DragSourceContainer:
@@ -0,0 +1,67 @@
+import time
+from threading import Thread, Lock, Event
+
+import cv2
+
+class Playback:
+    """Plays the project's frames at the project frame rate on its own thread.
+
+    The decoder paces itself on the monotonic clock and skips frames it can't decode in time, the preview
+    only ever reads the latest decoded frame. on_frame is called (on the playback thread) after each new frame,
+    so an idle UI can wake up for it.
+    """
+
+    def __init__(self, project, fps, start=0, loop=True, on_frame=None):
+        self.project = project
+        self.on_frame = on_frame
+        self.fps = max(fps, 1)
+        self.index = start
+        self.loop = loop
+
+        self.frame = None
+        self._lock = Lock()
+        self._stop = Event()
+        self._thread = None
+
+    def start(self):
+        self._stop.clear()
+        self._thread = Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self, wait=True):
+        self._stop.set()
+        if wait and self._thread:
+            self._thread.join()
+
+    def is_playing(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def latest(self):
+        with self._lock:
+            return self.index, self.frame
+
+    def _run(self):
+        frames = self.project.list_frames()
+        if not frames:
+            return
+
+        period = 1.0 / self.fps
+        started = time.monotonic() - self.index * period
+        while not self._stop.is_set():
+            # Frame due now, late decodes skip ahead instead of slowing playback down
+            index = int((time.monotonic() - started) / period)
+            if index >= len(frames):
+                if not self.loop:
+                    break
+                started += len(frames) * period
+                index %= len(frames)
+
+            frame = cv2.imread(str(self.project.frame_path(frames[index])), cv2.IMREAD_COLOR)
+            with self._lock:
+                self.index = index
+                if frame is not None:
+                    self.frame = frame
+            if self.on_frame is not None:
+                self.on_frame()
+
+            self._stop.wait(max(0.0, started + (index + 1) * period - time.monotonic()))
@@ -0,0 +1,103 @@
+import importlib
+import importlib.util
+import json
+import sys
+from importlib import metadata
+from pathlib import Path
+
+# Effect plugins
+#
+# Only metadata is read at startup: built-in effects are declared below, folder plugins ship a plugin.json
+# and installed packages declare "opensma.effects" entry points. The module implementing a node is imported
+# the first time that node is dropped into the graph.
+#
+# plugin.json:
+# {
+#     "module": "my_effects.py",
+#     "effects": [
+#         {"name": "Vignette", "category": "Look", "class": "Vignette",
+#          "parameters": [{"name": "Amount", "type": "float", "default": 0.5}]}
+#     ]
+# }
+
+ENTRY_POINT_GROUP = "opensma.effects"
+
+class EffectInfo:
+    def __init__(self, name, category, module, class_name, parameters=None, path=None):
+        self.name = name
+        self.category = category
+        self.module = module  # importable module name
+        self.class_name = class_name
+        self.parameters = parameters or []  # [{"name", "type", "default"}]
+        self.path = path  # file to load the module from, for folder plugins
+        self._node_class = None
+
+    def load(self):
+        if self._node_class is None:
+            if self.path is not None and self.module not in sys.modules:
+                spec = importlib.util.spec_from_file_location(self.module, self.path)
+                module = importlib.util.module_from_spec(spec)
+                sys.modules[self.module] = module
+                try:
+                    spec.loader.exec_module(module)
+                except Exception:
+                    del sys.modules[self.module]
+                    raise
+            else:
+                module = importlib.import_module(self.module)
+            self._node_class = getattr(module, self.class_name)
+        return self._node_class
+
+    def is_loaded(self):
+        return self._node_class is not None
+
+    def factory(self, name, data):
+        return self.load().factory(name, data)
+
+BUILTIN_EFFECTS = [
+    EffectInfo("Temperature", "Color", "effects", "Temperature", [{"name": "Temperature", "type": "float", "default": 0}]),
+    EffectInfo("Blend", "Composite", "effects", "Blend", [{"name": "Mix", "type": "float", "default": 0.5}]),
+    EffectInfo("Pick", "Composite", "effects", "Pick", [{"name": "Pick", "type": "choice", "default": "A"}]),
+    EffectInfo("Side by Side", "Composite", "effects", "SideBySide"),
+    EffectInfo("Stabilize", "Transform", "effects", "Stabilize", [{"name": "Analysis Width", "type": "int", "default": 256}]),
+    EffectInfo("Scopes", "Inspect", "effects", "Scopes", [{"name": "Rate (Hz)", "type": "float", "default": 5}]),
+    EffectInfo("Lens Correction", "Transform", "effects", "LensCorrection", [{"name": "Balance", "type": "float", "default": 0}]),
+    EffectInfo("3D LUT", "Color", "effects", "LUT3D", [{"name": "Preview Quality", "type": "choice", "default": "Fast"}]),
+    EffectInfo("Focus Assist", "Inspect", "effects", "FocusAssist", [{"name": "Threshold", "type": "int", "default": 40}]),
+    EffectInfo("Chroma Key", "Composite", "effects", "ChromaKey", [{"name": "Mode", "type": "choice", "default": "YCrCb"},
+                                                                  {"name": "Tolerance", "type": "int", "default": 40}]),
+]
+
+def discover_folder(plugins_folder):
+    effects = []
+    plugins_folder = Path(plugins_folder)
+    if not plugins_folder.is_dir():
+        return effects
+
+    for manifest_file in sorted(plugins_folder.glob("*/plugin.json")):
+        try:
+            with open(manifest_file, "r") as file:
+                manifest = json.load(file)
+
+            module_path = manifest_file.parent / manifest["module"]
+            module_name = f"opensma_plugin_{manifest_file.parent.name}_{Path(manifest['module']).stem}"
+            for effect in manifest["effects"]:
+                effects.append(EffectInfo(effect["name"], effect.get("category", "Effects"), module_name,
+                                          effect["class"], effect.get("parameters"), module_path))
+        except Exception as e:
+            # A broken plugin must not keep the app from starting
+            print(f"Skipping plugin {manifest_file.parent.name}: {e}")
+
+    return effects
+
+def discover_entry_points():
+    effects = []
+    for entry_point in metadata.entry_points(group=ENTRY_POINT_GROUP):
+        # value is "package.module:Class", the name may carry a category as "Category/Name"
+        module_name, _, class_name = entry_point.value.partition(":")
+        category, _, name = entry_point.name.rpartition("/")
+        effects.append(EffectInfo(name, category or "Effects", module_name, class_name))
+    return effects
+
+def discover_effects(plugins_folder):
+    return BUILTIN_EFFECTS + discover_folder(plugins_folder) + discover_entry_points()
@@ -0,0 +1,258 @@
+import importlib
+import importlib.util
+import multiprocessing
+import os
+import sys
+import time
+import traceback
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from bufferpool import frame_pool
+
+# Out-of-process node execution
+#
+# Frames travel through shared memory slots, only the slot position, shape, dtype and the node parameters
+# go through the pipe. A worker that crashes or hangs is killed and restarted, the node passes its input
+# through in the meantime. Response timeouts only apply once a worker has reported ready, spawning a process
+# and importing the node's module can take much longer than processing a frame.
+
+class WorkerError(Exception):
+    pass
+
+class WorkerStarting(WorkerError):
+    pass
+
+class SharedFrameRing:
+    def __init__(self, slot_count, slot_bytes):
+        self.slot_count = slot_count
+        self.slot_bytes = slot_bytes
+        self.shm = shared_memory.SharedMemory(create=True, size=slot_count * slot_bytes)
+        self._next = 0
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    def next_slot(self):
+        slot = self._next
+        self._next = (self._next + 1) % self.slot_count
+        return slot
+
+    def view(self, slot, shape, dtype):
+        return np.ndarray(shape, dtype, buffer=self.shm.buf, offset=slot * self.slot_bytes)
+
+    def close(self):
+        self.shm.close()
+        self.shm.unlink()
+
+def _load_class(module_name, module_file, class_name):
+    if module_name not in sys.modules and module_file:
+        spec = importlib.util.spec_from_file_location(module_name, module_file)
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[module_name] = module
+        spec.loader.exec_module(module)
+    module = importlib.import_module(module_name)
+    return getattr(module, class_name)
+
+def _attach(name, attached):
+    if name not in attached:
+        # The parent owns and unlinks the block. Spawned workers share the parent's resource tracker, so the
+        # registration is left alone: unregistering here would drop the parent's, and leak the block if it crashed
+        try:
+            shm = shared_memory.SharedMemory(name=name, track=False)
+        except TypeError:
+            # Before Python 3.13 attaching registers again, the tracker keeps a single entry per name
+            shm = shared_memory.SharedMemory(name=name)
+        attached[name] = shm
+    return attached[name]
+
+def _worker_main(conn, module_name, module_file, class_name):
+    try:
+        node_class = _load_class(module_name, module_file, class_name)
+    except Exception:
+        conn.send(("error", traceback.format_exc()))
+        return
+    conn.send(("ready", os.getpid()))
+    attached = {}
+
+    while True:
+        try:
+            message = conn.recv()
+        except EOFError:
+            break
+
+        if message[0] == "stop":
+            break
+
+        _, in_name, out_name, offset, slot_bytes, shape, dtype, params = message
+        try:
+            frame = np.ndarray(shape, dtype, buffer=_attach(in_name, attached).buf, offset=offset)
+            output = np.ascontiguousarray(node_class.process_frame(frame, params))
+            if output.nbytes > slot_bytes:
+                raise ValueError("output frame is larger than the input frame")
+
+            np.copyto(np.ndarray(output.shape, output.dtype, buffer=_attach(out_name, attached).buf, offset=offset), output)
+            conn.send(("ok", output.shape, output.dtype.str))
+        except Exception:
+            conn.send(("error", traceback.format_exc()))
+
+    for shm in attached.values():
+        shm.close()
+
+class _Worker:
+    SLOTS = 2
+    START_TIMEOUT = 60.0
+
+    def __init__(self, node_class):
+        module = sys.modules[node_class.__module__]
+        self._target_args = (node_class.__module__, getattr(module, "__file__", None), node_class.__name__)
+        self.process = None
+        self.conn = None
+        self.ready = False
+        self._started_at = 0.0
+        self._ring_in = None
+        self._ring_out = None
+
+    def is_alive(self):
+        return self.process is not None and self.process.is_alive()
+
+    def start(self):
+        context = multiprocessing.get_context("spawn")
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(target=_worker_main, args=(child_conn,) + self._target_args, daemon=True)
+        self.process.start()
+        self.ready = False
+        self._started_at = time.monotonic()
+
+    def poll_ready(self):
+        # Non-blocking, so the capture thread keeps running while the worker imports
+        if self.ready:
+            return True
+        if self.conn.poll(0):
+            try:
+                reply = self.conn.recv()
+            except EOFError:
+                raise WorkerError("worker exited")
+            if reply[0] == "error":
+                raise WorkerError(reply[1])
+            self.ready = True
+        elif time.monotonic() - self._started_at > self.START_TIMEOUT:
+            raise WorkerError("worker failed to start")
+        elif not self.process.is_alive():
+            raise WorkerError("worker exited")
+        return self.ready
+
+    def submit(self, frame, params):
+        if self._ring_in is None or self._ring_in.slot_bytes < frame.nbytes:
+            self._close_rings()
+            self._ring_in = SharedFrameRing(self.SLOTS, frame.nbytes)
+            self._ring_out = SharedFrameRing(self.SLOTS, frame.nbytes)
+
+        slot = self._ring_in.next_slot()
+        np.copyto(self._ring_in.view(slot, frame.shape, frame.dtype), frame)
+        self._slot = slot
+        self.conn.send(("process", self._ring_in.name, self._ring_out.name, slot * self._ring_in.slot_bytes,
+                        self._ring_in.slot_bytes, frame.shape, frame.dtype.str, params))
+
+    def receive(self, timeout):
+        if not self.conn.poll(timeout):
+            raise WorkerError("worker timed out")
+        try:
+            reply = self.conn.recv()
+        except EOFError:
+            raise WorkerError("worker exited")
+
+        if reply[0] == "error":
+            raise WorkerError(reply[1])
+        _, shape, dtype = reply
+        # Copy out of the slot: downstream nodes and caches may keep the frame after the slot is reused
+        return frame_pool.copy(self._ring_out.view(self._slot, shape, dtype))
+
+    def _close_rings(self):
+        for ring in (self._ring_in, self._ring_out):
+            if ring is not None:
+                ring.close()
+        self._ring_in = None
+        self._ring_out = None
+
+    def stop(self, kill=False):
+        if self.process is not None:
+            if not kill and self.process.is_alive():
+                try:
+                    self.conn.send(("stop",))
+                except (BrokenPipeError, OSError):
+                    pass
+                self.process.join(1.0)
+            if self.process.is_alive():
+                self.process.kill()
+                self.process.join()
+        self.process = None
+        self.ready = False
+        self._close_rings()
+
+class RemoteNodeExecutor:
+    """Runs node_class.process_frame(frame, params) in worker processes.
+
+    With several workers and a stripe_safe node class the frame is split into horizontal stripes processed in
+    parallel, otherwise a single worker is used.
+    """
+
+    RESTART_DELAY = 1.0
+
+    def __init__(self, node_class, workers=1, timeout=2.0):
+        self.node_class = node_class
+        self.timeout = timeout
+        count = workers if getattr(node_class, "stripe_safe", False) else 1
+        self._workers = [_Worker(node_class) for _ in range(max(1, count))]
+        self._restart_at = 0.0
+
+    def _ensure_running(self):
+        if all(worker.is_alive() for worker in self._workers):
+            return
+        if time.monotonic() < self._restart_at:
+            raise WorkerError("worker restarting")
+
+        for worker in self._workers:
+            if not worker.is_alive():
+                worker.stop(kill=True)
+                worker.start()
+
+    def pids(self):
+        return [worker.process.pid for worker in self._workers if worker.process is not None]
+
+    def process(self, frame, params):
+        self._ensure_running()
+
+        try:
+            if not all([worker.poll_ready() for worker in self._workers]):
+                raise WorkerStarting("worker starting")
+
+            if len(self._workers) == 1:
+                self._workers[0].submit(frame, params)
+                return self._workers[0].receive(self.timeout)
+
+            # All stripes are submitted before waiting, so the workers run in parallel
+            bounds = np.linspace(0, frame.shape[0], len(self._workers) + 1).astype(int)
+            used = []
+            for worker, start, end in zip(self._workers, bounds[:-1], bounds[1:]):
+                if end > start:
+                    worker.submit(frame[start:end], params)
+                    used.append(worker)
+            parts = [worker.receive(self.timeout) for worker in used]
+            output = frame_pool.acquire((frame.shape[0],) + parts[0].shape[1:], parts[0].dtype)
+            np.concatenate(parts, out=output)
+            return output
+        except WorkerStarting:
+            raise
+        except (WorkerError, BrokenPipeError, OSError, ValueError) as e:
+            # Kill whatever is left, a fresh worker is started after RESTART_DELAY
+            for worker in self._workers:
+                worker.stop(kill=True)
+            self._restart_at = time.monotonic() + self.RESTART_DELAY
+            raise WorkerError(str(e))
+
+    def close(self):
+        for worker in self._workers:
+            worker.stop()
@@ -0,0 +1,79 @@
+import time
+from threading import Thread, Event, Lock
+
+class IntervalScheduler:
+    """Calls callback(tick, due_time) every interval seconds for time-lapse capture.
+
+    Due times are computed as start + tick * interval on the monotonic clock, so there is no cumulative drift
+    however long the session runs. The callback returns False when it had to skip (a write still pending);
+    missed ticks are dropped rather than queued so the cadence is kept.
+    """
+
+    def __init__(self, interval, callback):
+        self._interval = interval
+        self.callback = callback
+        self.fired = 0
+        self.skipped = 0
+        self._tick = 0
+        self._start = 0.0
+        self._lock = Lock()  # guards _start/_tick against interval changes from the UI
+        self._stop_event = Event()
+        self._wake = Event()  # interrupts the wait when the interval changes
+        self._thread = None
+
+    @property
+    def interval(self):
+        return self._interval
+
+    @interval.setter
+    def interval(self, value):
+        with self._lock:
+            self._interval = value
+            if self.is_running():
+                # Rebase so the next shot is one new interval from now, instead of recomputing every due time
+                # from the original start (which would jump the next shot and count phantom skips)
+                self._start = time.monotonic() + value - self._tick * value
+        self._wake.set()
+
+    def is_running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        self.fired = 0
+        self.skipped = 0
+        self._tick = 0
+        self._start = time.monotonic()
+        self._stop_event.clear()
+        self._wake.clear()
+        self._thread = Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+        self._wake.set()
+        if self._thread:
+            self._thread.join()
+        self._thread = None
+
+    def _run(self):
+        while True:
+            with self._lock:
+                due = self._start + self._tick * self._interval
+            self._wake.wait(max(0.0, due - time.monotonic()))
+            if self._stop_event.is_set():
+                break
+            if self._wake.is_set():
+                # Interval changed, recompute the due time
+                self._wake.clear()
+                continue
+
+            if self.callback(self._tick, due):
+                self.fired += 1
+            else:
+                self.skipped += 1
+
+            # Next tick strictly in the future, ticks missed while the callback ran count as skipped
+            with self._lock:
+                next_tick = int((time.monotonic() - self._start) / self._interval) + 1
+                self.skipped += max(0, next_tick - self._tick - 1)
+                self._tick = max(self._tick + 1, next_tick)
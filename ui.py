@@ -1,6 +1,8 @@
 import dearpygui.dearpygui as dpg
 import ast
 
+from conform import Conform
+
 class ui:
     def __init__(self, app):
         self.app = app
@@ -11,8 +13,12 @@ class ui:
             dpg.add_input_float(label="Frame Rate", tag="new_project_fps", default_value=12)
             with dpg.child_window(height=90):
                 dpg.add_text("Resolution")
-                dpg.add_input_int(label="Width", tag="new_project_width", default_value=1920)
-                dpg.add_input_int(label="Height", tag="new_project_height", default_value=1080)
+                dpg.add_input_int(label="Width", tag="new_project_width", default_value=1920, min_value=1, min_clamped=True)
+                dpg.add_input_int(label="Height", tag="new_project_height", default_value=1080, min_value=1, min_clamped=True)
+
+            with dpg.child_window(height=70):
+                dpg.add_combo(label="Fit", items=Conform.MODES, tag="new_project_conform_mode", default_value="Crop")
+                dpg.add_combo(label="Interpolation", items=list(Conform.INTERPOLATIONS), tag="new_project_conform_interpolation", default_value="Area")
 
             with dpg.child_window(height=90):
                 dpg.add_text("Project Location")
@@ -26,6 +32,28 @@ class ui:
             dpg.add_text("Capture")
             dpg.add_image("texture_preview")
             dpg.add_button(label="Capture", callback=self.app.capture)
+            dpg.add_text("", tag="pool_stats_text")
+            with dpg.collapsing_header(label="Conform"):
+                dpg.add_combo(label="Fit", items=Conform.MODES, tag="conform_mode", default_value="Crop", width=150, callback=self.app.set_conform)
+                dpg.add_combo(label="Interpolation", items=list(Conform.INTERPOLATIONS), tag="conform_interpolation", default_value="Area", width=150, callback=self.app.set_conform)
+            with dpg.collapsing_header(label="Still Resolution"):
+                dpg.add_text("Capture stills in a larger camera mode than the preview (0 = use the preview)")
+                dpg.add_input_int(label="Still Width", default_value=self.app.CM.captureStillWidth, min_value=0, min_clamped=True, width=150, callback=lambda _, data: self.app.CM.set("captureStillWidth", data))
+                dpg.add_input_int(label="Still Height", default_value=self.app.CM.captureStillHeight, min_value=0, min_clamped=True, width=150, callback=lambda _, data: self.app.CM.set("captureStillHeight", data))
+                dpg.add_text("Still: -", tag="still_status")
+            with dpg.collapsing_header(label="Averaging"):
+                dpg.add_input_int(label="Frames", default_value=self.app.CM.captureAverageFrames, min_value=1, max_value=64, min_clamped=True, max_clamped=True, width=150, callback=lambda _, data: self.app.CM.set("captureAverageFrames", data))
+                dpg.add_checkbox(label="Reject outliers", default_value=self.app.CM.captureAverageRejectOutliers, callback=lambda _, data: self.app.CM.set("captureAverageRejectOutliers", data))
+            with dpg.collapsing_header(label="Auto Capture"):
+                dpg.add_checkbox(label="Capture when the scene is still after motion", callback=self.app.set_auto_capture)
+                dpg.add_input_float(label="Threshold (%)", default_value=self.app.CM.autoCaptureThreshold, min_value=0, max_value=100, min_clamped=True, max_clamped=True, width=150, callback=lambda _, data: self.app.CM.set("autoCaptureThreshold", data))
+                dpg.add_input_float(label="Still Time (s)", default_value=self.app.CM.autoCaptureStillTime, min_value=0, min_clamped=True, width=150, callback=lambda _, data: self.app.CM.set("autoCaptureStillTime", data))
+                dpg.add_drag_floatx(label="Region (x, y, w, h)", size=4, default_value=self.app.CM.autoCaptureROI, min_value=0, max_value=1, speed=0.01, width=300, callback=lambda _, data: self.app.CM.set("autoCaptureROI", list(data[:4])))
+                dpg.add_text("Motion: -", tag="auto_capture_status")
+            with dpg.collapsing_header(label="Interval Capture"):
+                dpg.add_input_float(label="Interval (s)", default_value=self.app.CM.intervalCaptureSeconds, min_value=0.1, min_clamped=True, width=150, callback=lambda _, data: self.app.CM.set("intervalCaptureSeconds", data))
+                dpg.add_button(label="Start", tag="interval_capture_button", callback=self.app.toggle_interval_capture)
+                dpg.add_text("Captured: 0  Skipped: 0", tag="interval_capture_status")
 
         with dpg.window(label="Effect", tag="effect_window", show=True, no_close=True, no_resize=True, no_title_bar=True, no_move=True):
             dpg.add_text("Effect")
@@ -33,27 +61,51 @@ class ui:
 
         with dpg.window(label="Frames", tag="frames_window", show=True, no_close=True, no_resize=True, no_title_bar=True, no_move=True):
             dpg.add_text("Frames")
-            # add group for frames
-            dpg.add_group(horizontal=True, tag="frames_window_group")
+            dpg.add_text("", tag="memory_text")
+            # frame strip is added by FramesPanel
 
 
         dpg.add_file_dialog(label="Open Project", tag="open_project_dialog", callback=self.app.open_project, directory_selector=True, show=False)
 
+        with dpg.file_dialog(label="Import Images or Video", tag="import_dialog", callback=self.app.import_media, show=False, width=600, height=400):
+            dpg.add_file_extension("Media{.mp4,.mov,.avi,.mkv,.webm,.m4v,.png,.jpg,.jpeg,.bmp,.tif,.tiff,.webp}")
+            dpg.add_file_extension(".*")
+
+        with dpg.window(label="Importing", tag="import_window", show=False, modal=True, no_close=True, width=320):
+            dpg.add_text("Importing frames...")
+            dpg.add_progress_bar(tag="import_progress", width=-1)
+            dpg.add_button(label="Cancel", callback=self.app.cancel_import)
+
         with dpg.window(label="Preferences", tag="preferences_window", show=False, width=320):
             with dpg.tab_bar():
                 with dpg.tab(label="Camera"):
-                    dpg.add_combo(label="Camera", items=self.app.camera_list, callback=lambda _, data: (setattr(self.app.CM, "cameraID", ast.literal_eval(data)[0]), self.app.CM.save()), default_value=self.app.camera_list[next((i for i, item in enumerate(self.app.camera_list) if item[0] == self.app.CM.cameraID), None)])
-                    dpg.add_input_text(label="Camera URL (Network)", callback=lambda _, data: (setattr(self.app.CM, "cameraURL", data), self.app.CM.save()), default_value=self.app.CM.cameraURL)
+                    dpg.add_combo(label="Camera", items=self.app.camera_list, callback=lambda _, data: self.app.CM.set("cameraID", ast.literal_eval(data)[0]), default_value=self.app.camera_list[next((i for i, item in enumerate(self.app.camera_list) if item[0] == self.app.CM.cameraID), None)])
+                    dpg.add_input_text(label="Camera URL (Network)", on_enter=True, callback=lambda _, data: self.app.CM.set("cameraURL", data), default_value=self.app.CM.cameraURL)
                     dpg.add_spacer()
-                    dpg.add_input_int(label="Width", default_value=self.app.CM.cameraResolutionWidth, callback=lambda _, data: (setattr(self.app.CM, "cameraResolutionWidth", data), self.app.CM.save()))
-                    dpg.add_input_int(label="Height", default_value=self.app.CM.cameraResolutionHeight, callback=lambda _, data: (setattr(self.app.CM, "cameraResolutionHeight", data), self.app.CM.save()))
-                    dpg.add_input_float(label="FPS", default_value=self.app.CM.cameraFPS, callback=lambda _, data: (setattr(self.app.CM, "cameraFPS", data), self.app.CM.save()))
-                    #dpg.add_input_float(label="Brightness", default_value=self.app.CM.cameraBrightness, callback=lambda _, data: (setattr(self.app.CM, "cameraBrightness", data), self.app.CM.save()))
-                    #dpg.add_input_float(label="Contrast", default_value=self.app.CM.cameraContrast, callback=lambda _, data: (setattr(self.app.CM, "cameraContrast", data), self.app.CM.save()))
-                    #dpg.add_input_float(label="Saturation", default_value=self.app.CM.cameraSaturation, callback=lambda _, data: (setattr(self.app.CM, "cameraSaturation", data), self.app.CM.save()))
-                    #dpg.add_input_float(label="Hue", default_value=self.app.CM.cameraHue, callback=lambda _, data: (setattr(self.app.CM, "cameraHue", data), self.app.CM.save()))
-                    #dpg.add_input_float(label="Gain", default_value=self.app.CM.cameraGain, callback=lambda _, data: (setattr(self.app.CM, "cameraGain", data), self.app.CM.save()))
-                    #dpg.add_input_float(label="Exposure", default_value=self.app.CM.cameraExposure, callback=lambda _, data: (setattr(self.app.CM, "cameraExposure", data), self.app.CM.save()))
+                    dpg.add_input_int(label="Width", default_value=self.app.CM.cameraResolutionWidth, on_enter=True, callback=lambda _, data: self.app.CM.set("cameraResolutionWidth", data))
+                    dpg.add_input_int(label="Height", default_value=self.app.CM.cameraResolutionHeight, on_enter=True, callback=lambda _, data: self.app.CM.set("cameraResolutionHeight", data))
+                    dpg.add_input_float(label="FPS", default_value=self.app.CM.cameraFPS, on_enter=True, callback=lambda _, data: self.app.CM.set("cameraFPS", data))
+                    #dpg.add_input_float(label="Brightness", default_value=self.app.CM.cameraBrightness, callback=lambda _, data: self.app.CM.set("cameraBrightness", data))
+                    #dpg.add_input_float(label="Contrast", default_value=self.app.CM.cameraContrast, callback=lambda _, data: self.app.CM.set("cameraContrast", data))
+                    #dpg.add_input_float(label="Saturation", default_value=self.app.CM.cameraSaturation, callback=lambda _, data: self.app.CM.set("cameraSaturation", data))
+                    #dpg.add_input_float(label="Hue", default_value=self.app.CM.cameraHue, callback=lambda _, data: self.app.CM.set("cameraHue", data))
+                    #dpg.add_input_float(label="Gain", default_value=self.app.CM.cameraGain, callback=lambda _, data: self.app.CM.set("cameraGain", data))
+                    #dpg.add_input_float(label="Exposure", default_value=self.app.CM.cameraExposure, callback=lambda _, data: self.app.CM.set("cameraExposure", data))
+
+                with dpg.tab(label="History"):
+                    dpg.add_input_int(label="Undo disk budget (MB)", default_value=self.app.CM.historyDiskBudget, min_value=0, min_clamped=True, callback=lambda _, data: self.app.CM.set("historyDiskBudget", data))
+
+                with dpg.tab(label="Memory"):
+                    dpg.add_input_int(label="Memory budget (MB)", default_value=self.app.CM.memoryBudgetMB, min_value=64, min_clamped=True, callback=lambda _, data: self.app.CM.set("memoryBudgetMB", data))
+
+                with dpg.tab(label="Interface"):
+                    dpg.add_input_int(label="Max refresh rate (FPS, 0 = display)", default_value=self.app.CM.uiMaxFPS, min_value=0, max_value=240, min_clamped=True, max_clamped=True, callback=lambda _, data: self.app.CM.set("uiMaxFPS", data))
+                    dpg.add_input_int(label="Idle refresh rate (FPS)", default_value=self.app.CM.uiIdleFPS, min_value=1, max_value=60, min_clamped=True, max_clamped=True, callback=lambda _, data: self.app.CM.set("uiIdleFPS", data))
+
+                with dpg.tab(label="Control"):
+                    dpg.add_checkbox(label="Enable local control server", default_value=self.app.CM.controlServerEnabled, callback=lambda _, data: self.app.CM.set("controlServerEnabled", data))
+                    dpg.add_input_int(label="Port (localhost)", default_value=self.app.CM.controlServerPort, min_value=1, max_value=65535, min_clamped=True, max_clamped=True, on_enter=True, callback=lambda _, data: self.app.CM.set("controlServerPort", data))
+                    dpg.add_input_text(label="Unix socket (optional)", default_value=self.app.CM.controlServerSocket, on_enter=True, callback=lambda _, data: self.app.CM.set("controlServerSocket", data))
 
 
         with dpg.window(tag="dialog_window", show=False, modal=True, no_move=True, no_title_bar=True, width=320):
@@ -78,14 +130,14 @@ class ui:
                 #dpg.add_menu_item(label="Save as", shortcut="Ctrl+Shift+S")
                 dpg.add_menu_item(label="Close Project", callback=self.app.close_project)
                 dpg.add_spacer()
-                dpg.add_menu_item(label="Import", shortcut="Ctrl+I")
+                dpg.add_menu_item(label="Import", shortcut="Ctrl+I", callback=self.app.pre_import)
                 dpg.add_menu_item(label="Export", shortcut="Ctrl+M")
                 dpg.add_spacer()
                 dpg.add_menu_item(label="Exit", callback=lambda: self.app.exit())
 
             with dpg.menu(label="Edit"):
-                dpg.add_menu_item(label="Undo", shortcut="Ctrl+Z")
-                dpg.add_menu_item(label="Redo", shortcut="Ctrl+Y")
+                dpg.add_menu_item(label="Undo", shortcut="Ctrl+Z", callback=self.app.undo)
+                dpg.add_menu_item(label="Redo", shortcut="Ctrl+Y", callback=self.app.redo)
                 dpg.add_spacer()
                 dpg.add_menu_item(label="Cut", shortcut="Ctrl+X")
                 dpg.add_menu_item(label="Copy", shortcut="Ctrl+C")